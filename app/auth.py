@@ -1,7 +1,11 @@
 import hmac
 import ipaddress
 import os
+import socket
+from bisect import bisect_right
+from functools import lru_cache
 from pathlib import Path
+from typing import Optional
 
 from fastapi import Header, HTTPException, Request
 
@@ -19,15 +23,17 @@ def _request_agent_token(request: Request, *, x_agent_key: str = "", authorizati
         if token:
             return token
 
+    # Skip the fallback probes outright when there is nothing to probe;
+    # most agent requests carry no query string at all.
     headers = getattr(request, "headers", None)
-    if headers is not None:
+    if headers:
         for header_name in ("x-api-key", "x-crab-api-key", "x-openclaw-api-key"):
             token = str(headers.get(header_name, "") or "").strip()
             if token:
                 return token
 
     query_params = getattr(request, "query_params", None)
-    if query_params is not None:
+    if query_params:
         for query_name in (
             "api_key",
             "x-agent-key",
@@ -58,36 +64,46 @@ async def require_agent(
     if not token:
         raise HTTPException(status_code=401, detail="missing_agent_key_or_bearer_token")
 
-    agent_id = STATE.key_to_agent.get(token)
+    agent_id = STATE.agent_for_api_key(token)
     if not agent_id:
         raise HTTPException(status_code=403, detail="invalid_agent_key")
     return agent_id
 
 
 def _client_ip(request: Request) -> str:
-    cf_ip = str(request.headers.get("cf-connecting-ip", "")).strip()
+    headers = request.headers
+    cf_ip = str(headers.get("cf-connecting-ip", "")).strip()
     if cf_ip:
         return cf_ip
-    xff = str(request.headers.get("x-forwarded-for", "")).strip()
+    xff = str(headers.get("x-forwarded-for", "")).strip()
     if xff:
         return xff.split(",", 1)[0].strip()
     client = request.client.host if request.client else ""
     return str(client or "").strip()
 
 
-def _parse_admin_allowlist() -> list[ipaddress._BaseNetwork]:
-    raw = str(os.getenv("CRAB_ADMIN_ALLOWLIST", "")).strip()
-    if not raw:
-        allowlist_file = Path(
-            os.getenv("CRAB_ADMIN_ALLOWLIST_FILE", "~/.config/crab-trading/admin_allowlist")
-        ).expanduser()
-        try:
-            if allowlist_file.exists():
-                raw = allowlist_file.read_text(encoding="utf-8").strip()
-        except Exception:
-            raw = ""
-    if not raw:
-        return []
+_CONFIG_FILE_CACHE: dict[str, tuple[float, str]] = {}
+
+
+def _read_config_file(path: Path) -> str:
+    # Admin config files are re-read only when their mtime changes.
+    try:
+        mtime = path.stat().st_mtime
+    except OSError:
+        return ""
+    key = str(path)
+    cached = _CONFIG_FILE_CACHE.get(key)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+    try:
+        text = path.read_text(encoding="utf-8").strip()
+    except Exception:
+        text = ""
+    _CONFIG_FILE_CACHE[key] = (mtime, text)
+    return text
+
+
+def _networks_from_text(raw: str) -> list[ipaddress._BaseNetwork]:
     entries = [item.strip() for item in raw.split(",") if item.strip()]
     networks: list[ipaddress._BaseNetwork] = []
     for item in entries:
@@ -104,14 +120,59 @@ def _parse_admin_allowlist() -> list[ipaddress._BaseNetwork]:
     return networks
 
 
-def _is_ip_allowed(ip_text: str, allowlist: list[ipaddress._BaseNetwork]) -> bool:
+# IP version -> collapsed, sorted (starts, ends) integer ranges for bisect.
+_AllowlistRanges = dict[int, tuple[list[int], list[int]]]
+
+
+@lru_cache(maxsize=8)
+def _allowlist_ranges(raw: str) -> Optional[_AllowlistRanges]:
+    # Keyed on the raw allowlist text, so a request only hashes one string
+    # (cached on the str object) before the O(log n) bisect.
+    networks = _networks_from_text(raw)
+    if not networks:
+        return None
+    ranges: _AllowlistRanges = {}
+    for version in (4, 6):
+        starts: list[int] = []
+        ends: list[int] = []
+        for network in ipaddress.collapse_addresses(item for item in networks if item.version == version):
+            starts.append(int(network.network_address))
+            ends.append(int(network.broadcast_address))
+        ranges[version] = (starts, ends)
+    return ranges
+
+
+def _parse_admin_allowlist() -> Optional[_AllowlistRanges]:
+    raw = str(os.getenv("CRAB_ADMIN_ALLOWLIST", "")).strip()
+    if not raw:
+        allowlist_file = Path(
+            os.getenv("CRAB_ADMIN_ALLOWLIST_FILE", "~/.config/crab-trading/admin_allowlist")
+        ).expanduser()
+        raw = _read_config_file(allowlist_file)
+    if not raw:
+        return None
+    return _allowlist_ranges(raw)
+
+
+def _is_ip_allowed(ip_text: str, allowlist: Optional[_AllowlistRanges]) -> bool:
     if not allowlist:
         return True
-    try:
-        ip_obj = ipaddress.ip_address(str(ip_text or "").strip())
-    except ValueError:
-        return False
-    return any(ip_obj in network for network in allowlist)
+    text = str(ip_text or "").strip()
+    if ":" not in text:
+        # IPv4 fast path: inet_pton parses strict dotted quads in C.
+        try:
+            version, ip_int = 4, int.from_bytes(socket.inet_pton(socket.AF_INET, text), "big")
+        except OSError:
+            return False
+    else:
+        try:
+            ip_obj = ipaddress.ip_address(text)
+        except ValueError:
+            return False
+        version, ip_int = ip_obj.version, int(ip_obj)
+    starts, ends = allowlist[version]
+    idx = bisect_right(starts, ip_int) - 1
+    return idx >= 0 and ip_int <= ends[idx]
 
 
 async def require_admin(
@@ -123,11 +184,7 @@ async def require_admin(
         token_file = Path(
             os.getenv("CRAB_ADMIN_TOKEN_FILE", "~/.config/crab-trading/admin_token")
         ).expanduser()
-        try:
-            if token_file.exists():
-                admin_token = token_file.read_text(encoding="utf-8").strip()
-        except Exception:
-            admin_token = ""
+        admin_token = _read_config_file(token_file)
     if not admin_token:
         raise HTTPException(status_code=503, detail="admin_not_configured")
 
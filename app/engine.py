@@ -88,6 +88,7 @@ def submit_market_order(agent_id: str, req: OrderRequest) -> Order:
             account.cash += notional
 
         _update_position_with_trade(account, req.symbol, signed_qty, fill_price)
+        STATE.invalidate_valuations(agent_id)
 
         return Order(
             order_id=str(uuid4()),
@@ -304,18 +304,25 @@ def _seo_public_agent_summary_locked(
     }
 
 
+_SEO_EPOCH = datetime.fromtimestamp(0, tz=timezone.utc)
+
+
 def _seo_parse_recent_ts(value: object) -> datetime:
     raw = str(value or "").strip()
     if not raw:
-        return datetime.fromtimestamp(0, tz=timezone.utc)
+        return _SEO_EPOCH
     normalized = raw[:-1] + "+00:00" if raw.endswith("Z") else raw
     try:
         parsed = datetime.fromisoformat(normalized)
-        if parsed.tzinfo is None:
-            return parsed.replace(tzinfo=timezone.utc)
-        return parsed.astimezone(timezone.utc)
     except Exception:
-        return datetime.fromtimestamp(0, tz=timezone.utc)
+        return _SEO_EPOCH
+    tzinfo = parsed.tzinfo
+    if tzinfo is timezone.utc:
+        # fromisoformat hands back the utc singleton for +00:00 / Z stamps.
+        return parsed
+    if tzinfo is None:
+        return parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc)
 
 
 def _seo_normalize_live_symbol(symbol: str, provider: str) -> str:
@@ -478,10 +485,24 @@ def seo_forum_page(limit: int = 80) -> str:
     hidden_agents = set(list_soft_deleted_agents())
     latest_activity_dt: Optional[datetime] = None
 
+    # agent_id -> uuid for rows stored without agent_uuid; posts and comments
+    # repeat the same few authors.
+    resolved_ids: dict[str, str] = {}
+
+    def _row_owner_uuid(row: dict) -> str:
+        owner_uuid = str(row.get("agent_uuid", "")).strip()
+        if owner_uuid:
+            return owner_uuid
+        agent_id = str(row.get("agent_id", ""))
+        owner_uuid = resolved_ids.get(agent_id)
+        if owner_uuid is None:
+            owner_uuid = resolved_ids[agent_id] = _resolve_agent_uuid(agent_id) or ""
+        return owner_uuid
+
     with STATE.lock:
         visible_posts: list[dict[str, Any]] = []
         for post in STATE.forum_posts:
-            post_owner_uuid = str(post.get("agent_uuid", "")).strip() or _resolve_agent_uuid(str(post.get("agent_id", ""))) or ""
+            post_owner_uuid = _row_owner_uuid(post)
             if post_owner_uuid and post_owner_uuid in hidden_agents:
                 continue
             if _HIDE_TEST_DATA and _is_test_post(post):
@@ -505,7 +526,7 @@ def seo_forum_page(limit: int = 80) -> str:
                 continue
             if _HIDE_TEST_DATA and _is_test_comment(comment):
                 continue
-            comment_uuid = str(comment.get("agent_uuid", "")).strip() or _resolve_agent_uuid(str(comment.get("agent_id", ""))) or ""
+            comment_uuid = _row_owner_uuid(comment)
             if comment_uuid and comment_uuid in hidden_agents:
                 continue
             row = _apply_agent_identity(comment)
@@ -566,11 +587,13 @@ def seo_forum_page(limit: int = 80) -> str:
         if idx % 9 == 4:
             layout_classes.append("forum-card--compact")
         card_classes = " ".join(["card", "forum-card", variant_class, *layout_classes]).strip()
+        # Escaped once; the card links to the thread twice.
+        post_href = html_escape(_post_page_path(pid))
 
         cards_html.append(
             f"""
             <article class="{card_classes}">
-              <h2 class="forum-card-title"><a href="{html_escape(_post_page_path(pid))}">{html_escape(title)}</a></h2>
+              <h2 class="forum-card-title"><a href="{post_href}">{html_escape(title)}</a></h2>
               <p class="meta">
                 by <a href="{html_escape(_agent_page_path(agent_id))}">{html_escape(agent_id)}</a>
                 · {html_escape(created_at)}{symbol_html}
@@ -578,7 +601,7 @@ def seo_forum_page(limit: int = 80) -> str:
               <p class="forum-card-content">{html_escape(excerpt)}</p>
               <p class="forum-card-foot">
                 <span class="pill">{reply_count} replies</span>
-                <a class="forum-open-link" href="{html_escape(_post_page_path(pid))}">Open thread</a>
+                <a class="forum-open-link" href="{post_href}">Open thread</a>
               </p>
               {replies_block}
             </article>
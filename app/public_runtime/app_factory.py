@@ -1,13 +1,17 @@
 from __future__ import annotations
 
 import json
+import os
 import re
+from contextlib import asynccontextmanager
 from pathlib import Path
+from typing import AsyncIterator
 
 from fastapi import FastAPI, HTTPException
 from fastapi.responses import FileResponse, HTMLResponse, PlainTextResponse
 
 from ..asset_version import ASSET_VER
+from ..state import STATE
 from .routers.agent_routes import router as agent_router
 from .routers.discovery_routes import router as discovery_router
 from .routers.follow_routes import router as follow_router
@@ -27,6 +31,11 @@ _SKILL_FALLBACK = {
     "last_updated": "2026-02-27",
     "description": "Crab Trading public protocol runtime with mock execution only and parallel Polymarket/Kalshi simulation.",
 }
+_SKILL_JSON_MAX_BYTES = 1 << 20
+_SKILL_JSON_CACHE: tuple[float, dict] | None = None
+_SKILL_MD_CACHE: tuple[tuple[float | None, float | None], str] | None = None
+_CRAB_ICON_FULLMATCH = re.compile(r"[a-z0-9\-]+\.svg").fullmatch
+_CRAB_NETWORK_ICON_FULLMATCH = re.compile(r"crab-net-(0[1-9]|10)\.svg").fullmatch
 
 
 def _read_text_or_empty(path: Path) -> str:
@@ -41,16 +50,65 @@ def _read_html_with_asset_ver(path: Path) -> str:
 
 
 def _skill_json() -> dict:
+    # skill.json only changes on deploy; reparse it only when its mtime moves.
+    global _SKILL_JSON_CACHE
     path = STATIC_DIR / "skill.json"
     try:
-        payload = json.loads(path.read_text(encoding="utf-8"))
+        mtime = path.stat().st_mtime
+    except OSError:
+        return dict(_SKILL_FALLBACK)
+    cached = _SKILL_JSON_CACHE
+    if cached is not None and cached[0] == mtime:
+        return dict(cached[1])
+    out = dict(_SKILL_FALLBACK)
+    try:
+        # Read and fstat through one fd so the cached mtime matches the
+        # bytes actually parsed.
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            mtime = os.fstat(fd).st_mtime
+            raw = os.read(fd, _SKILL_JSON_MAX_BYTES)
+        finally:
+            os.close(fd)
+        payload = json.loads(raw) if raw else {}
         if isinstance(payload, dict):
-            out = dict(_SKILL_FALLBACK)
             out.update(payload)
-            return out
     except Exception:
         pass
-    return dict(_SKILL_FALLBACK)
+    _SKILL_JSON_CACHE = (mtime, out)
+    return dict(out)
+
+
+def _mtime_or_none(path: Path) -> float | None:
+    try:
+        return path.stat().st_mtime
+    except OSError:
+        return None
+
+
+def _skill_md() -> str:
+    # Rendered skill.md depends on skill.md and skill.json; rerender only
+    # when either file's mtime moves.
+    global _SKILL_MD_CACHE
+    md_path = STATIC_DIR / "skill.md"
+    cache_key = (_mtime_or_none(md_path), _mtime_or_none(STATIC_DIR / "skill.json"))
+    cached = _SKILL_MD_CACHE
+    if cached is not None and cached[0] == cache_key:
+        return cached[1]
+    text = _read_text_or_empty(md_path)
+    if not text:
+        return "# Crab Trading\n"
+    meta = _skill_json()
+    replacements = {
+        "__SKILL_VERSION__": str(meta.get("version") or _SKILL_FALLBACK["version"]),
+        "__SKILL_MIN_VERSION__": str(meta.get("min_version") or _SKILL_FALLBACK["min_version"]),
+        "__SKILL_LAST_UPDATED__": str(meta.get("last_updated") or _SKILL_FALLBACK["last_updated"]),
+        "__SKILL_DESCRIPTION__": str(meta.get("description") or _SKILL_FALLBACK["description"]),
+    }
+    for key, value in replacements.items():
+        text = text.replace(key, value)
+    _SKILL_MD_CACHE = (cache_key, text)
+    return text
 
 
 def _serve_static_file(file_name: str, media_type: str) -> FileResponse:
@@ -60,6 +118,14 @@ def _serve_static_file(file_name: str, media_type: str) -> FileResponse:
     return FileResponse(target, media_type=media_type)
 
 
+@asynccontextmanager
+async def _lifespan(app: FastAPI) -> AsyncIterator[None]:
+    yield
+    # Mutations persist through STATE.request_save(); write out anything
+    # still waiting on the flusher before the worker exits.
+    STATE.flush_pending_save()
+
+
 def create_public_app() -> FastAPI:
     app = FastAPI(
         title="Crab Trading Public",
@@ -67,6 +133,7 @@ def create_public_app() -> FastAPI:
         docs_url=None,
         redoc_url=None,
         openapi_url=None,
+        lifespan=_lifespan,
     )
 
     app.include_router(health_router)
@@ -102,19 +169,7 @@ def create_public_app() -> FastAPI:
 
     @app.get("/skill.md", response_class=PlainTextResponse)
     def skill_md() -> str:
-        text = _read_text_or_empty(STATIC_DIR / "skill.md")
-        if not text:
-            return "# Crab Trading\n"
-        meta = _skill_json()
-        replacements = {
-            "__SKILL_VERSION__": str(meta.get("version") or _SKILL_FALLBACK["version"]),
-            "__SKILL_MIN_VERSION__": str(meta.get("min_version") or _SKILL_FALLBACK["min_version"]),
-            "__SKILL_LAST_UPDATED__": str(meta.get("last_updated") or _SKILL_FALLBACK["last_updated"]),
-            "__SKILL_DESCRIPTION__": str(meta.get("description") or _SKILL_FALLBACK["description"]),
-        }
-        for key, value in replacements.items():
-            text = text.replace(key, value)
-        return text
+        return _skill_md()
 
     @app.get("/skill.json")
     def skill_json() -> dict:
@@ -192,14 +247,14 @@ def create_public_app() -> FastAPI:
     @app.get("/crabs/{icon_name}")
     def crab_avatar_svg(icon_name: str) -> FileResponse:
         safe_name = str(icon_name or "").strip()
-        if not re.fullmatch(r"[a-z0-9\-]+\.svg", safe_name):
+        if not _CRAB_ICON_FULLMATCH(safe_name):
             raise HTTPException(status_code=404, detail="file_not_found")
         return _serve_static_file(f"crabs/{safe_name}", "image/svg+xml")
 
     @app.get("/crabs-network/{icon_name}")
     def crab_network_svg(icon_name: str) -> FileResponse:
         safe_name = str(icon_name or "").strip()
-        if not re.fullmatch(r"crab-net-(0[1-9]|10)\.svg", safe_name):
+        if not _CRAB_NETWORK_ICON_FULLMATCH(safe_name):
             raise HTTPException(status_code=404, detail="file_not_found")
         return _serve_static_file(f"crabs-network/{safe_name}", "image/svg+xml")
 
@@ -1,8 +1,9 @@
 from __future__ import annotations
 
-import re
+import base64
 import secrets
-from uuid import uuid4
+import string
+from uuid import UUID
 
 from fastapi import APIRouter, Depends, HTTPException
 
@@ -13,12 +14,12 @@ from ..services.common import now_iso, resolve_agent_uuid
 
 router = APIRouter(prefix="/api/v1/public", tags=["public-agent"])
 
-_AGENT_NAME_RE = re.compile(r"^[A-Za-z0-9_\-]{3,64}$")
+_AGENT_NAME_CHARS = frozenset(string.ascii_letters + string.digits + "_-")
 
 
 def _normalize_agent_name(name: str) -> str:
     text = str(name or "").strip()
-    if not _AGENT_NAME_RE.fullmatch(text):
+    if not (3 <= len(text) <= 64 and _AGENT_NAME_CHARS.issuperset(text)):
         raise HTTPException(status_code=400, detail="invalid_agent_id")
     return text
 
@@ -26,38 +27,41 @@ def _normalize_agent_name(name: str) -> str:
 @router.post("/agents/register")
 def register_agent(req: AgentRegisterRequest) -> dict:
     name = _normalize_agent_name(req.name)
+    # Nothing is ordered by registered_at; stamp it outside the write lock.
+    registered_at = now_iso()
     with STATE.lock:
         if STATE.resolve_agent_uuid(name):
             raise HTTPException(status_code=409, detail="agent_already_exists")
 
-        agent_uuid = str(uuid4())
-        while agent_uuid in STATE.accounts:
-            agent_uuid = str(uuid4())
-
-        api_key = secrets.token_urlsafe(30)
-        while api_key in STATE.key_to_agent:
-            api_key = secrets.token_urlsafe(30)
+        # One CSPRNG read for both credentials: 30 bytes for the api key
+        # (same encoding as token_urlsafe(30)) and 16 for a v4 uuid.
+        # 122/240 random bits: a collision is not a case worth retrying.
+        raw = secrets.token_bytes(46)
+        api_key = base64.urlsafe_b64encode(raw[:30]).rstrip(b"=").decode("ascii")
+        agent_uuid = str(UUID(bytes=raw[30:], version=4))
+        if agent_uuid in STATE.accounts or api_key in STATE.key_to_agent:
+            raise HTTPException(status_code=500, detail="agent_credentials_collision")
 
         account = AgentAccount(
             agent_uuid=agent_uuid,
             display_name=name,
             cash=2000.0,
             description=str(req.description or "").strip(),
-            registered_at=now_iso(),
+            registered_at=registered_at,
             registration_source="public_api_v1",
         )
 
         STATE.accounts[agent_uuid] = account
         STATE.agent_name_to_uuid[name] = agent_uuid
         STATE.agent_keys[agent_uuid] = api_key
-        STATE.key_to_agent[api_key] = agent_uuid
+        STATE.bind_api_key_unlocked(api_key, agent_uuid)
         STATE.record_operation(
             "agent_registered",
             agent_uuid=agent_uuid,
             details={"source": "public_v1"},
             agent_id=name,
         )
-        STATE.save_runtime_state()
+        STATE.request_save()
 
     return {
         "status": "ok",
@@ -73,7 +77,7 @@ def register_agent(req: AgentRegisterRequest) -> dict:
 
 @router.get("/agents/me")
 def get_my_profile(agent_uuid: str = Depends(require_agent)) -> dict:
-    with STATE.lock:
+    with STATE.lock.read():
         account = STATE.accounts.get(agent_uuid)
         if not account:
             raise HTTPException(status_code=404, detail="agent_not_found")
@@ -130,7 +134,7 @@ def patch_my_profile(req: AgentProfilePatchRequest, agent_uuid: str = Depends(re
                 agent_uuid=agent_uuid,
                 details={"fields": changed},
             )
-            STATE.save_runtime_state()
+            STATE.request_save()
 
         return {
             "status": "ok",
@@ -4,8 +4,8 @@ from datetime import datetime, timezone
 
 from fastapi import APIRouter, HTTPException, Query
 
-from ...state import STATE
-from ..services.common import resolve_agent_uuid
+from ...state import STATE, TRADE_EVENT_TYPES
+from ..services.common import event_agent_uuid, resolve_agent_uuid
 from ..services.discovery_rank import discovery_cards
 
 router = APIRouter(prefix="/api/v1/public", tags=["public-discovery"])
@@ -141,21 +141,29 @@ def get_discovery_tags(limit: int = 60) -> dict:
 def get_discovery_activity(limit: int = 40) -> dict:
     safe_limit = max(1, min(int(limit), 500))
     rows: list[dict] = []
-    with STATE.lock:
+    # agent_uuid -> (agent_id, avatar); the feed repeats the same few agents.
+    identities: dict[str, tuple[str, str]] = {}
+    with STATE.lock.read():
         for event in reversed(STATE.activity_log):
-            etype = str(event.get("type", "")).strip().lower()
-            if etype not in {"stock_order", "poly_bet", "poly_sell", "poly_resolved"}:
+            etype = event.get("type")
+            if etype not in TRADE_EVENT_TYPES:
                 continue
             details = event.get("details") if isinstance(event.get("details"), dict) else {}
-            agent_uuid = str(event.get("agent_uuid", "")).strip() or resolve_agent_uuid(str(event.get("agent_id", "")))
-            account = STATE.accounts.get(agent_uuid) if agent_uuid else None
+            agent_uuid = event_agent_uuid(event)
+            identity = identities.get(agent_uuid)
+            if identity is None:
+                account = STATE.accounts.get(agent_uuid) if agent_uuid else None
+                identity = identities[agent_uuid] = (
+                    str(account.display_name if account else STATE.display_name_for(agent_uuid) or ""),
+                    str((account.avatar if account else "") or ""),
+                )
             item = {
                 "id": int(event.get("id", 0) or 0),
                 "type": etype,
                 "created_at": str(event.get("created_at", "") or ""),
                 "agent_uuid": agent_uuid,
-                "agent_id": str(account.display_name if account else STATE.display_name_for(agent_uuid) or ""),
-                "avatar": str((account.avatar if account else "") or ""),
+                "agent_id": identity[0],
+                "avatar": identity[1],
                 "execution_mode": "mock",
             }
             if etype == "stock_order":
@@ -266,7 +274,7 @@ def get_public_trading_code(agent_id: str, include_code: bool = Query(default=Tr
     target_uuid = resolve_agent_uuid(agent_id)
     if not target_uuid:
         raise HTTPException(status_code=404, detail="agent_not_found")
-    with STATE.lock:
+    with STATE.lock.read():
         account = STATE.accounts.get(target_uuid)
         if not account:
             raise HTTPException(status_code=404, detail="agent_not_found")
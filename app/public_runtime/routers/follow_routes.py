@@ -5,9 +5,9 @@ from datetime import datetime, timedelta, timezone
 from fastapi import APIRouter, Depends, HTTPException
 
 from ...auth import require_agent
-from ...state import STATE
+from ...state import STATE, TRADE_EVENT_TYPES
 from ..schemas.follow import FollowCreateRequest, FollowEventRequest
-from ..services.common import normalize_symbols, resolve_agent_uuid
+from ..services.common import event_agent_uuid, normalize_symbols, resolve_agent_uuid
 from ..services.discovery_rank import leaderboard_rows
 
 router = APIRouter(prefix="/api/v1/public", tags=["public-follow"])
@@ -49,7 +49,7 @@ def _entry_for_response(entry: dict | str) -> dict:
 
 @router.get("/following")
 def get_following(agent_uuid: str = Depends(require_agent)) -> dict:
-    with STATE.lock:
+    with STATE.lock.read():
         entries = STATE.agent_following.get(agent_uuid, [])
         rows = [_entry_for_response(entry) for entry in entries]
 
@@ -108,7 +108,7 @@ def follow_agent(req: FollowCreateRequest, agent_uuid: str = Depends(require_age
                 "execution_mode": "mock",
             },
         )
-        STATE.save_runtime_state()
+        STATE.request_save()
 
     return {
         "status": "ok",
@@ -146,7 +146,7 @@ def unfollow_agent(target_agent_id: str, agent_uuid: str = Depends(require_agent
                 agent_uuid=agent_uuid,
                 details={"target_agent_uuid": target_uuid, "target_agent_id": STATE.display_name_for(target_uuid), "execution_mode": "mock"},
             )
-            STATE.save_runtime_state()
+            STATE.request_save()
 
     return {
         "status": "ok",
@@ -160,29 +160,36 @@ def unfollow_agent(target_agent_id: str, agent_uuid: str = Depends(require_agent
 def get_following_alerts(limit: int = 20, since_id: int = 0, agent_uuid: str = Depends(require_agent)) -> dict:
     safe_limit = max(1, min(int(limit), 200))
     safe_since = max(0, int(since_id or 0))
-    with STATE.lock:
+    with STATE.lock.read():
         entries = STATE.agent_following.get(agent_uuid, [])
         target_uuids = {_entry_target_uuid(item) for item in entries}
         rows = []
-        for event in reversed(STATE.activity_log):
+        # Alerts usually come from a handful of leaders; resolve each name once.
+        actor_names: dict[str, str] = {}
+        # Event ids grow with append order, so the newest-first walk ends at
+        # the since_id cursor instead of visiting the rest of the log.
+        for event in reversed(STATE.activity_log) if target_uuids else ():
             event_id = int(event.get("id", 0) or 0)
             if event_id <= safe_since:
+                break
+            etype = event.get("type")
+            if etype not in TRADE_EVENT_TYPES:
                 continue
-            etype = str(event.get("type", "")).strip().lower()
-            if etype not in {"stock_order", "poly_bet", "poly_sell", "poly_resolved"}:
-                continue
-            actor = str(event.get("agent_uuid", "")).strip() or resolve_agent_uuid(str(event.get("agent_id", "")))
+            actor = event_agent_uuid(event)
             if actor not in target_uuids:
                 continue
             details = event.get("details") if isinstance(event.get("details"), dict) else {}
+            actor_name = actor_names.get(actor)
+            if actor_name is None:
+                actor_name = actor_names[actor] = STATE.display_name_for(actor)
             rows.append(
                 {
                     "id": event_id,
                     "type": etype,
                     "actor_agent_uuid": actor,
-                    "actor_agent_id": STATE.display_name_for(actor),
+                    "actor_agent_id": actor_name,
                     "created_at": str(event.get("created_at", "") or ""),
-                    "summary": f"{STATE.display_name_for(actor)} {etype}",
+                    "summary": f"{actor_name} {etype}",
                     "details": details,
                     "execution_mode": "mock",
                 }
@@ -207,39 +214,40 @@ def get_following_alerts(limit: int = 20, since_id: int = 0, agent_uuid: str = D
 def get_following_top(limit: int = 20, hours: int = 24 * 7, agent_uuid: str = Depends(require_agent)) -> dict:
     safe_limit = max(1, min(int(limit), 200))
     safe_hours = max(1, min(int(hours), 24 * 90))
-    cutoff = datetime.now(timezone.utc) - timedelta(hours=safe_hours)
+    cutoff_ts = (datetime.now(timezone.utc) - timedelta(hours=safe_hours)).timestamp()
     followed = set()
-    with STATE.lock:
+    with STATE.lock.read():
         entries = STATE.agent_following.get(agent_uuid, [])
         for item in entries:
             followed.add(_entry_target_uuid(item))
 
+    # active events in window; activity_log is append-ordered, so the
+    # newest-first walk stops at the first event older than the cutoff.
+    # Events whose created_at could not be parsed carry created_ts 0.0 and
+    # are skipped rather than ending the walk.
+    recent_by_leader: dict[str, int] = {}
+    if followed:
+        with STATE.lock.read():
+            for event in reversed(STATE.activity_log):
+                created_ts = float(event.get("created_ts", 0.0) or 0.0)
+                if created_ts <= 0.0:
+                    continue
+                if created_ts < cutoff_ts:
+                    break
+                etype = event.get("type")
+                if etype not in TRADE_EVENT_TYPES:
+                    continue
+                actor = event_agent_uuid(event)
+                if actor in followed:
+                    recent_by_leader[actor] = recent_by_leader.get(actor, 0) + 1
+
     leaders = []
     rank_rows = leaderboard_rows(limit=500)
     for row in rank_rows:
         target_uuid = str(row.get("agent_uuid", "")).strip()
         if target_uuid and target_uuid in followed:
-            # active events in window
-            recent_events = 0
-            with STATE.lock:
-                for event in STATE.activity_log:
-                    actor = str(event.get("agent_uuid", "")).strip() or resolve_agent_uuid(str(event.get("agent_id", "")))
-                    if actor != target_uuid:
-                        continue
-                    etype = str(event.get("type", "")).strip().lower()
-                    if etype not in {"stock_order", "poly_bet", "poly_sell", "poly_resolved"}:
-                        continue
-                    created_at = str(event.get("created_at", "") or "")
-                    try:
-                        dt = datetime.fromisoformat(created_at)
-                        if dt.tzinfo is None:
-                            dt = dt.replace(tzinfo=timezone.utc)
-                    except Exception:
-                        continue
-                    if dt >= cutoff:
-                        recent_events += 1
             item = dict(row)
-            item["recent_events"] = recent_events
+            item["recent_events"] = recent_by_leader.get(target_uuid, 0)
             item["execution_mode"] = "mock"
             leaders.append(item)
         if len(leaders) >= safe_limit:
@@ -269,5 +277,5 @@ def capture_public_follow_event(req: FollowEventRequest) -> dict:
             agent_id="public",
             details={"event_name": event_name, **normalized, "execution_mode": "mock"},
         )
-        STATE.save_runtime_state()
+        STATE.request_save()
     return {"status": "ok", "execution_mode": "mock"}
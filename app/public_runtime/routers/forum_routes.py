@@ -1,94 +1,161 @@
 from __future__ import annotations
 
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import JSONResponse
 
 from ...auth import require_agent
 from ...state import STATE
 from ..schemas.forum import ForumCommentCreate, ForumPostCreate
-from ..services.common import now_iso, resolve_agent_uuid
+from ..services.common import decode_cursor, encode_cursor, now_iso, resolve_agent_uuid
 
 router = APIRouter(prefix="/api/v1/public", tags=["public-forum"])
 
 
-def _post_comments(post_id: int, comments_limit: int = 50) -> list[dict]:
-    rows = []
+def _comment_row(comment: dict) -> dict:
+    return {
+        "comment_id": int(comment.get("comment_id", 0) or 0),
+        "post_id": int(comment.get("post_id", 0) or 0),
+        "agent_id": str(comment.get("agent_id", "")).strip(),
+        "agent_uuid": str(comment.get("agent_uuid", "")).strip(),
+        "avatar": str(comment.get("avatar", "")).strip(),
+        "content": str(comment.get("content", "")).strip(),
+        "created_at": str(comment.get("created_at", "")).strip(),
+        "parent_id": int(comment.get("parent_id", 0) or 0) or None,
+    }
+
+
+def _comment_rows_by_post(post_ids: set[int]) -> dict[int, list[dict]]:
+    # One pass over forum_comments for every requested post; call under
+    # STATE.lock and sort the result with _sorted_comments after releasing it.
+    out: dict[int, list[dict]] = {post_id: [] for post_id in post_ids}
+    if not out:
+        return out
     for comment in STATE.forum_comments:
         if not isinstance(comment, dict):
             continue
-        if int(comment.get("post_id", 0) or 0) != int(post_id):
-            continue
-        rows.append(
-            {
-                "comment_id": int(comment.get("comment_id", 0) or 0),
-                "post_id": int(comment.get("post_id", 0) or 0),
-                "agent_id": str(comment.get("agent_id", "")).strip(),
-                "agent_uuid": str(comment.get("agent_uuid", "")).strip(),
-                "avatar": str(comment.get("avatar", "")).strip(),
-                "content": str(comment.get("content", "")).strip(),
-                "created_at": str(comment.get("created_at", "")).strip(),
-                "parent_id": int(comment.get("parent_id", 0) or 0) or None,
-            }
-        )
+        rows = out.get(int(comment.get("post_id", 0) or 0))
+        if rows is not None:
+            rows.append(_comment_row(comment))
+    return out
+
+
+def _sorted_comments(rows: list[dict], comments_limit: int = 50) -> list[dict]:
     rows.sort(key=lambda item: (str(item.get("created_at", "")), int(item.get("comment_id", 0))))
     return rows[: max(1, min(int(comments_limit), 200))]
 
 
+def _forum_posts_end_before(created_at: str, post_id: int) -> int:
+    # bisect_left over STATE.forum_posts, which is kept in (created_at,
+    # post_id) order: everything before the result sorts before the cursor.
+    cursor_key = (created_at, post_id)
+    lo, hi = 0, len(STATE.forum_posts)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        post = STATE.forum_posts[mid]
+        if (post["created_at"], post["post_id"]) < cursor_key:
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo
+
+
 @router.get("/forum/posts")
-def list_forum_posts(limit: int = 20, offset: int = 0, symbol: str = "", include_comments: bool = True, comments_limit: int = 20) -> dict:
+def list_forum_posts(
+    limit: int = 20,
+    offset: int = 0,
+    symbol: str = "",
+    include_comments: bool = True,
+    comments_limit: int = 20,
+    cursor: str = "",
+) -> JSONResponse:
     safe_limit = max(1, min(int(limit), 200))
     safe_offset = max(0, int(offset))
     safe_symbol = str(symbol or "").strip().upper()
     safe_comments_limit = max(1, min(int(comments_limit), 200))
+    cursor_payload = decode_cursor(cursor)
+    cursor_created_at = ""
+    cursor_post_id = 0
+    if cursor_payload:
+        try:
+            cursor_created_at = str(cursor_payload["created_at"]).strip()
+            cursor_post_id = int(cursor_payload["post_id"])
+        except (KeyError, TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="invalid_cursor")
+        # Keyset paging replaces offset.
+        safe_offset = 0
 
-    with STATE.lock:
-        rows: list[dict] = []
-        for post in STATE.forum_posts:
-            if not isinstance(post, dict):
+    # STATE.forum_posts is kept in (created_at, post_id) order (oldest first),
+    # so the newest-first page is a reverse walk that only serializes the window.
+    with STATE.lock.read():
+        if safe_symbol:
+            total = STATE.forum_post_counts.get(safe_symbol, 0)
+        else:
+            total = len(STATE.forum_posts)
+        end = _forum_posts_end_before(cursor_created_at, cursor_post_id) if cursor_payload else len(STATE.forum_posts)
+        selected: list[dict] = []
+        skipped = 0
+        has_more = False
+        for idx in range(end - 1, -1, -1):
+            post = STATE.forum_posts[idx]
+            if safe_symbol and post["symbol"] != safe_symbol:
                 continue
-            post_symbol = str(post.get("symbol", "")).strip().upper()
-            if safe_symbol and post_symbol != safe_symbol:
+            post_id = post["post_id"]
+            created_at = post["created_at"]
+            if skipped < safe_offset:
+                skipped += 1
                 continue
-            post_id = int(post.get("post_id", 0) or 0)
+            if len(selected) >= safe_limit:
+                has_more = True
+                break
             item = {
                 "post_id": post_id,
-                "agent_id": str(post.get("agent_id", "")).strip(),
-                "agent_uuid": str(post.get("agent_uuid", "")).strip(),
-                "avatar": str(post.get("avatar", "")).strip(),
-                "symbol": post_symbol,
-                "title": str(post.get("title", "")).strip(),
-                "content": str(post.get("content", "")).strip(),
-                "created_at": str(post.get("created_at", "")).strip(),
-                "likes": int(post.get("likes", 0) or 0),
-                "comments_count": int(post.get("comments_count", 0) or 0),
+                "agent_id": post["agent_id"],
+                "agent_uuid": post["agent_uuid"],
+                "avatar": post["avatar"],
+                "symbol": post["symbol"],
+                "title": post["title"],
+                "content": post["content"],
+                "created_at": created_at,
+                "likes": post["likes"],
+                "comments_count": post["comments_count"],
             }
-            if include_comments:
-                comments = _post_comments(post_id=post_id, comments_limit=safe_comments_limit)
-                item["comments"] = comments
-                item["comments_count"] = len(comments)
-            rows.append(item)
-        rows.sort(key=lambda item: str(item.get("created_at", "")), reverse=True)
-
-    total = len(rows)
-    selected = rows[safe_offset : safe_offset + safe_limit]
-    return {
-        "status": "ok",
-        "execution_mode": "mock",
-        "posts": selected,
-        "total": total,
-        "limit": safe_limit,
-        "offset": safe_offset,
-        "has_more": safe_offset + len(selected) < total,
-    }
+            selected.append(item)
+        comment_rows = _comment_rows_by_post({item["post_id"] for item in selected}) if include_comments else {}
+
+    if include_comments:
+        for item in selected:
+            comments = _sorted_comments(comment_rows.get(item["post_id"], []), comments_limit=safe_comments_limit)
+            item["comments"] = comments
+            item["comments_count"] = len(comments)
+
+    next_cursor = ""
+    if has_more and selected:
+        last = selected[-1]
+        next_cursor = encode_cursor({"created_at": last["created_at"], "post_id": last["post_id"]})
+    return JSONResponse(
+        {
+            "status": "ok",
+            "execution_mode": "mock",
+            "posts": selected,
+            "total": total,
+            "limit": safe_limit,
+            "offset": safe_offset,
+            "has_more": has_more,
+            "next_cursor": next_cursor,
+        }
+    )
 
 
 @router.post("/forum/posts")
 def create_forum_post(req: ForumPostCreate, agent_uuid: str = Depends(require_agent)) -> dict:
-    now = now_iso()
     symbol = str(req.symbol or "").strip().upper()
     with STATE.lock:
         account = STATE.accounts.get(agent_uuid)
         if not account:
             raise HTTPException(status_code=404, detail="agent_not_found")
+        # Stamped under the lock: forum_posts must stay in (created_at, post_id) order
+        # for list_forum_posts' bisect paging.
+        now = now_iso()
         post = {
             "post_id": STATE.next_forum_post_id,
             "agent_id": account.display_name,
@@ -102,13 +169,13 @@ def create_forum_post(req: ForumPostCreate, agent_uuid: str = Depends(require_ag
             "comments_count": 0,
         }
         STATE.next_forum_post_id += 1
-        STATE.forum_posts.append(post)
+        STATE.add_forum_post_unlocked(post)
         STATE.record_operation(
             "forum_post",
             agent_uuid=agent_uuid,
             details={"post_id": post["post_id"], "symbol": symbol, "execution_mode": "mock"},
         )
-        STATE.save_runtime_state()
+        STATE.request_save()
     return {"status": "ok", "execution_mode": "mock", "post": post}
 
 
@@ -129,7 +196,7 @@ def delete_forum_post(post_id: int, agent_uuid: str = Depends(require_agent)) ->
         if owner_uuid != agent_uuid:
             raise HTTPException(status_code=403, detail="not_post_owner")
 
-        deleted = STATE.forum_posts.pop(idx)
+        deleted = STATE.pop_forum_post_unlocked(idx)
         before = len(STATE.forum_comments)
         STATE.forum_comments = [item for item in STATE.forum_comments if int(item.get("post_id", 0) or 0) != int(post_id)]
         removed_comments = before - len(STATE.forum_comments)
@@ -138,7 +205,7 @@ def delete_forum_post(post_id: int, agent_uuid: str = Depends(require_agent)) ->
             agent_uuid=agent_uuid,
             details={"post_id": int(post_id), "removed_comments": int(removed_comments), "execution_mode": "mock"},
         )
-        STATE.save_runtime_state()
+        STATE.request_save()
     return {
         "status": "ok",
         "execution_mode": "mock",
@@ -151,11 +218,12 @@ def delete_forum_post(post_id: int, agent_uuid: str = Depends(require_agent)) ->
 @router.get("/forum/posts/{post_id}/comments")
 def list_post_comments(post_id: int, limit: int = 50) -> dict:
     safe_limit = max(1, min(int(limit), 200))
-    with STATE.lock:
+    with STATE.lock.read():
         post_exists = any(int(post.get("post_id", 0) or 0) == int(post_id) for post in STATE.forum_posts)
         if not post_exists:
             raise HTTPException(status_code=404, detail="post_not_found")
-        rows = _post_comments(post_id=post_id, comments_limit=safe_limit)
+        rows = _comment_rows_by_post({int(post_id)})[int(post_id)]
+    rows = _sorted_comments(rows, comments_limit=safe_limit)
 
     return {
         "status": "ok",
@@ -200,6 +268,6 @@ def create_post_comment(post_id: int, req: ForumCommentCreate, agent_uuid: str =
             agent_uuid=agent_uuid,
             details={"post_id": int(post_id), "comment_id": int(comment["comment_id"]), "execution_mode": "mock"},
         )
-        STATE.save_runtime_state()
+        STATE.request_save()
 
     return {"status": "ok", "execution_mode": "mock", "comment": comment}
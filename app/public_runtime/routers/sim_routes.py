@@ -1,12 +1,19 @@
 from __future__ import annotations
 
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import JSONResponse
 
 from ...auth import require_agent
 from ...state import STATE
 from ..schemas.sim import Side, SimOrderCreateRequest, SimPolyBetCreateRequest, SimPolySellCreateRequest
-from ..services.common import resolve_agent_uuid, serialize_trade_event, valuation_for_account
-from ..services.discovery_rank import leaderboard_rows
+from ..services.common import (
+    decode_cursor,
+    encode_cursor,
+    resolve_agent_uuid,
+    serialize_trade_event,
+    valuation_for_account,
+)
+from ..services.discovery_rank import leaderboard_page, leaderboard_sort_key
 from ..services import mock_broker
 
 router = APIRouter(prefix="/api/v1/public", tags=["public-sim"])
@@ -14,7 +21,7 @@ router = APIRouter(prefix="/api/v1/public", tags=["public-sim"])
 
 @router.get("/sim/account")
 def get_sim_account(agent_uuid: str = Depends(require_agent)) -> dict:
-    with STATE.lock:
+    with STATE.lock.read():
         account = STATE.accounts.get(agent_uuid)
         if not account:
             raise HTTPException(status_code=404, detail="agent_not_found")
@@ -104,7 +111,7 @@ def get_orders(limit: int = 50, agent_uuid: str = Depends(require_agent)) -> dic
 
 @router.get("/sim/positions")
 def get_positions(agent_uuid: str = Depends(require_agent)) -> dict:
-    with STATE.lock:
+    with STATE.lock.read():
         account = STATE.accounts.get(agent_uuid)
         if not account:
             raise HTTPException(status_code=404, detail="agent_not_found")
@@ -133,35 +140,56 @@ def get_positions(agent_uuid: str = Depends(require_agent)) -> dict:
 
 
 @router.get("/sim/leaderboard")
-def get_sim_leaderboard(limit: int = 20) -> dict:
+def get_sim_leaderboard(limit: int = 20, cursor: str = "") -> JSONResponse:
     safe_limit = max(1, min(int(limit), 500))
-    rows = leaderboard_rows(limit=safe_limit)
-    return {
-        "status": "ok",
-        "execution_mode": "mock",
-        "leaderboard": rows,
-        "total": len(rows),
-        "limit": safe_limit,
-    }
+    cursor_payload = decode_cursor(cursor)
+    cursor_key = None
+    if cursor_payload:
+        try:
+            cursor_key = leaderboard_sort_key(cursor_payload)
+        except (TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="invalid_cursor")
+    # Only this page's rows are rounded and get symbols; the cursor filter
+    # runs on the sort key, so paging has no depth cap.
+    rows, has_more = leaderboard_page(safe_limit, after=cursor_key)
+    next_cursor = ""
+    if has_more and rows:
+        last = rows[-1]
+        next_cursor = encode_cursor(
+            {
+                "ranking_score": last["ranking_score"],
+                "cash_total": last["cash_total"],
+                "followers": last["followers"],
+                "agent_id": last["agent_id"],
+            }
+        )
+    return JSONResponse(
+        {
+            "status": "ok",
+            "execution_mode": "mock",
+            "leaderboard": rows,
+            "total": len(rows),
+            "limit": safe_limit,
+            "has_more": has_more,
+            "next_cursor": next_cursor,
+        }
+    )
 
 
 @router.get("/sim/agents/{agent_id}/trades")
-def get_agent_recent_trades(agent_id: str, limit: int = 20) -> dict:
+def get_agent_recent_trades(agent_id: str, limit: int = 20) -> JSONResponse:
     safe_limit = max(1, min(int(limit), 500))
     target_uuid = resolve_agent_uuid(agent_id)
     if not target_uuid:
         raise HTTPException(status_code=404, detail="agent_not_found")
 
-    with STATE.lock:
+    with STATE.lock.read():
         account = STATE.accounts.get(target_uuid)
         if not account:
             raise HTTPException(status_code=404, detail="agent_not_found")
         valuation = valuation_for_account(account)
         trades = []
-        for event in reversed(STATE.activity_log):
-            actor = str(event.get("agent_uuid", "")).strip() or resolve_agent_uuid(str(event.get("agent_id", "")))
-            if actor != target_uuid:
-                continue
+        for event in reversed(STATE.trade_events_by_agent.get(target_uuid, ())):
             trade = serialize_trade_event(event)
             if trade is None:
                 continue
@@ -169,29 +197,31 @@ def get_agent_recent_trades(agent_id: str, limit: int = 20) -> dict:
             if len(trades) >= safe_limit:
                 break
 
-    return {
-        "status": "ok",
-        "execution_mode": "mock",
-        "agent_id": account.display_name,
-        "agent_uuid": target_uuid,
-        "avatar": account.avatar,
-        "account": {
-            "cash": round(float(valuation["cash"]), 4),
-            "stock_market_value": round(float(valuation["stock_market_value"]), 4),
-            "crypto_market_value": round(float(valuation["crypto_market_value"]), 4),
-            "poly_market_value": round(float(valuation["poly_market_value"]), 4),
-            "kalshi_market_value": round(float(valuation.get("kalshi_market_value", 0.0) or 0.0), 4),
-            "prediction_market_value": round(float(valuation.get("prediction_market_value", 0.0) or 0.0), 4),
-            "balance": round(float(valuation["equity"]), 4),
-            "return_pct": round(float(valuation["return_pct"]), 6),
-            "stock_realized_pnl": round(float(account.realized_pnl), 4),
-            "poly_realized_pnl": round(float(account.poly_realized_pnl), 4),
-            "kalshi_realized_pnl": round(float(getattr(account, "kalshi_realized_pnl", 0.0) or 0.0), 4),
-        },
-        "trades": trades,
-        "total": len(trades),
-        "limit": safe_limit,
-    }
+    return JSONResponse(
+        {
+            "status": "ok",
+            "execution_mode": "mock",
+            "agent_id": account.display_name,
+            "agent_uuid": target_uuid,
+            "avatar": account.avatar,
+            "account": {
+                "cash": round(float(valuation["cash"]), 4),
+                "stock_market_value": round(float(valuation["stock_market_value"]), 4),
+                "crypto_market_value": round(float(valuation["crypto_market_value"]), 4),
+                "poly_market_value": round(float(valuation["poly_market_value"]), 4),
+                "kalshi_market_value": round(float(valuation.get("kalshi_market_value", 0.0) or 0.0), 4),
+                "prediction_market_value": round(float(valuation.get("prediction_market_value", 0.0) or 0.0), 4),
+                "balance": round(float(valuation["equity"]), 4),
+                "return_pct": round(float(valuation["return_pct"]), 6),
+                "stock_realized_pnl": round(float(account.realized_pnl), 4),
+                "poly_realized_pnl": round(float(account.poly_realized_pnl), 4),
+                "kalshi_realized_pnl": round(float(getattr(account, "kalshi_realized_pnl", 0.0) or 0.0), 4),
+            },
+            "trades": trades,
+            "total": len(trades),
+            "limit": safe_limit,
+        }
+    )
 
 
 @router.get("/sim/poly/markets")
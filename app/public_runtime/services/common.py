@@ -1,11 +1,16 @@
 from __future__ import annotations
 
+import base64
+import json
 from datetime import datetime, timezone
-from typing import Any
+from typing import Any, Iterable
 
-from ...state import AgentAccount, STATE
+from fastapi import HTTPException
+
+from ...state import AgentAccount, STATE, TRADE_EVENT_TYPES
 
 _SIM_STARTING_BALANCE = 2000.0
+_STARTING_BALANCE_RECIP_PCT = 100.0 / _SIM_STARTING_BALANCE
 
 
 def now_iso() -> str:
@@ -20,12 +25,18 @@ def resolve_agent_uuid(identifier: str) -> str:
     return str(out or "").strip()
 
 
-def _is_crypto_symbol(symbol: str) -> bool:
-    s = str(symbol or "").strip().upper()
-    if not s:
-        return False
-    quote_symbols = ("USDT", "USDC", "USD", "BTC", "ETH")
-    base_symbols = {
+def event_agent_uuid(event: dict) -> str:
+    # Events carry agent_uuid since write time (and load backfills legacy
+    # rows), so the name index is only a fallback; callers hold STATE.lock.
+    agent_uuid = str(event.get("agent_uuid", "")).strip()
+    if agent_uuid:
+        return agent_uuid
+    return STATE._resolve_agent_uuid_unlocked(str(event.get("agent_id", ""))) or ""
+
+
+_CRYPTO_QUOTE_SYMBOLS = ("USDT", "USDC", "USD", "BTC", "ETH")
+_CRYPTO_BASE_SYMBOLS = frozenset(
+    {
         "BTC",
         "ETH",
         "SOL",
@@ -49,23 +60,39 @@ def _is_crypto_symbol(symbol: str) -> bool:
         "OP",
         "NEAR",
     }
-    if s in base_symbols:
-        return True
-    for quote in quote_symbols:
-        if s.endswith(quote):
-            base = s[: -len(quote)]
-            if base in base_symbols:
-                return True
-    return False
+)
+_CRYPTO_SYMBOLS = _CRYPTO_BASE_SYMBOLS | frozenset(
+    base + quote for base in _CRYPTO_BASE_SYMBOLS for quote in _CRYPTO_QUOTE_SYMBOLS
+)
+
+
+def _is_crypto_symbol(symbol: str) -> bool:
+    return str(symbol or "").strip().upper() in _CRYPTO_SYMBOLS
 
 
-def valuation_for_account(account: AgentAccount) -> dict[str, float]:
+def valuation_for_account(
+    account: AgentAccount,
+    marks: dict[str, tuple[float, bool]] | None = None,
+) -> dict[str, float]:
+    # Served from STATE.valuation_cache until the account trades or a
+    # price/market changes (see TradingState.invalidate_valuations).
+    epoch = STATE.valuation_epoch
+    cached = STATE.valuation_cache.get(account.agent_uuid)
+    if cached is not None and cached[0] == epoch:
+        return dict(cached[1])
+
+    if marks is None:
+        marks = {}
     stock_value = 0.0
     crypto_value = 0.0
     for symbol, qty in account.positions.items():
-        px = float(STATE.stock_prices.get(str(symbol).upper(), 0.0) or 0.0)
+        mark = marks.get(symbol)
+        if mark is None:
+            mark = (float(STATE.stock_prices.get(str(symbol).upper(), 0.0) or 0.0), _is_crypto_symbol(symbol))
+            marks[symbol] = mark
+        px, is_crypto = mark
         value = float(qty or 0.0) * px
-        if _is_crypto_symbol(symbol):
+        if is_crypto:
             crypto_value += value
         else:
             stock_value += value
@@ -97,8 +124,8 @@ def valuation_for_account(account: AgentAccount) -> dict[str, float]:
 
     prediction_market_value = float(poly_value) + float(kalshi_value)
     equity = float(account.cash) + float(stock_value) + float(crypto_value) + prediction_market_value
-    return_pct = ((equity - _SIM_STARTING_BALANCE) / _SIM_STARTING_BALANCE) * 100.0 if _SIM_STARTING_BALANCE > 0 else 0.0
-    return {
+    return_pct = (equity - _SIM_STARTING_BALANCE) * _STARTING_BALANCE_RECIP_PCT
+    valuation = {
         "cash": float(account.cash),
         "stock_market_value": float(stock_value),
         "crypto_market_value": float(crypto_value),
@@ -108,6 +135,15 @@ def valuation_for_account(account: AgentAccount) -> dict[str, float]:
         "equity": float(equity),
         "return_pct": float(return_pct),
     }
+    STATE.valuation_cache[account.agent_uuid] = (epoch, valuation)
+    return dict(valuation)
+
+
+def valuations_for_accounts(accounts: Iterable[AgentAccount]) -> dict[str, dict[str, float]]:
+    # Batch form for leaderboard-style scans: symbol price + crypto/stock
+    # classification is resolved once per symbol and shared across accounts.
+    marks: dict[str, tuple[float, bool]] = {}
+    return {account.agent_uuid: valuation_for_account(account, marks) for account in accounts}
 
 
 def follower_count_for_agent(target_uuid: str) -> int:
@@ -115,7 +151,7 @@ def follower_count_for_agent(target_uuid: str) -> int:
     if not target:
         return 0
     total = 0
-    with STATE.lock:
+    with STATE.lock.read():
         for entries in STATE.agent_following.values():
             if not isinstance(entries, list):
                 continue
@@ -140,20 +176,20 @@ def risk_label_for_return_pct(return_pct: float) -> str:
 
 
 def ensure_account(agent_uuid: str) -> AgentAccount | None:
-    with STATE.lock:
+    with STATE.lock.read():
         return STATE.accounts.get(str(agent_uuid or "").strip())
 
 
 def serialize_trade_event(event: dict[str, Any]) -> dict[str, Any] | None:
     if not isinstance(event, dict):
         return None
-    etype = str(event.get("type", "")).strip().lower()
-    if etype not in {"stock_order", "poly_bet", "poly_sell", "poly_resolved"}:
+    etype = event.get("type")
+    if etype not in TRADE_EVENT_TYPES:
         return None
     details = event.get("details") if isinstance(event.get("details"), dict) else {}
     details_provider = str(details.get("provider", "poly") or "poly").strip().lower() or "poly"
     provider_event_type = str(details.get("provider_event_type", "") or "").strip().lower()
-    actor_uuid = str(event.get("agent_uuid", "")).strip() or resolve_agent_uuid(str(event.get("agent_id", "")))
+    actor_uuid = event_agent_uuid(event)
     base: dict[str, Any] = {
         "id": int(event.get("id", 0) or 0),
         "type": etype,
@@ -242,5 +278,24 @@ def normalize_symbols(symbols: list[str] | None) -> list[str]:
     return rows
 
 
+def encode_cursor(payload: dict[str, Any]) -> str:
+    raw = json.dumps(payload, separators=(",", ":"), sort_keys=True).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> dict[str, Any]:
+    text = str(cursor or "").strip()
+    if not text:
+        return {}
+    try:
+        raw = base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+        payload = json.loads(raw)
+    except Exception:
+        raise HTTPException(status_code=400, detail="invalid_cursor")
+    if not isinstance(payload, dict):
+        raise HTTPException(status_code=400, detail="invalid_cursor")
+    return payload
+
+
 def clamp_int(value: int, *, low: int, high: int) -> int:
     return max(low, min(high, int(value)))
@@ -1,165 +1,194 @@
 from __future__ import annotations
 
-from ...state import STATE
-from .common import follower_count_for_agent, normalize_symbols, risk_label_for_return_pct, valuation_for_account
+import heapq
 
+from ...state import STATE, TRADE_EVENT_TYPES
+from .common import follower_count_for_agent, normalize_symbols, risk_label_for_return_pct, valuations_for_accounts
 
-def _agent_symbols(agent_uuid: str) -> list[str]:
+
+def _agent_symbols_unlocked(agent_uuid: str) -> list[str]:
+    account = STATE.accounts.get(agent_uuid)
+    if not account:
+        return []
     symbols: list[str] = []
-    with STATE.lock:
-        account = STATE.accounts.get(agent_uuid)
-        if not account:
-            return []
-        symbols.extend([str(item).upper() for item in account.positions.keys()])
-        symbols.extend([str(item).upper() for item in account.poly_positions.keys()])
-        symbols.extend([str(item).upper() for item in account.kalshi_positions.keys()])
+    symbols.extend([str(item).upper() for item in account.positions.keys()])
+    symbols.extend([str(item).upper() for item in account.poly_positions.keys()])
+    symbols.extend([str(item).upper() for item in account.kalshi_positions.keys()])
     return normalize_symbols(symbols)[:6]
 
 
+_ROUND_4_FIELDS = (
+    "cash",
+    "cash_available",
+    "cash_locked",
+    "stock_market_value",
+    "crypto_market_value",
+    "poly_market_value",
+    "kalshi_market_value",
+    "prediction_market_value",
+    "settled_pnl",
+    "open_pnl",
+    "fee_paid",
+    "net_pnl",
+    "balance",
+)
+
+
+def leaderboard_sort_key(row: dict) -> tuple[float, float, int, str]:
+    return (
+        -float(row.get("ranking_score", 0.0)),
+        -float(row.get("cash_total", 0.0)),
+        -int(row.get("followers", 0)),
+        str(row.get("agent_id", "")),
+    )
+
+
+def _activity_trade_stats() -> tuple[dict[str, int], dict[tuple[str, str, str], float]]:
+    # One pass over activity_log: trade events per agent, and the net
+    # prediction-market cost logged per (agent_uuid, provider, market_id).
+    # Caller holds STATE.lock.
+    trade_counts: dict[str, int] = {}
+    logged_costs: dict[tuple[str, str, str], float] = {}
+    for event in STATE.activity_log:
+        event_type = event.get("type")
+        if event_type not in TRADE_EVENT_TYPES:
+            continue
+        agent_uuid = str(event.get("agent_uuid", "")).strip()
+        trade_counts[agent_uuid] = trade_counts.get(agent_uuid, 0) + 1
+        if event_type not in {"poly_bet", "poly_sell"}:
+            continue
+        details = event.get("details") if isinstance(event.get("details"), dict) else {}
+        provider = str(details.get("provider", "poly") or "poly").strip().lower()
+        key = (agent_uuid, provider, str(details.get("market_id", "")).strip())
+        try:
+            if event_type == "poly_bet":
+                amount = float(details.get("amount", 0.0) or 0.0)
+            else:
+                amount = -float(details.get("released_cost", details.get("lock_amount", 0.0)) or 0.0)
+        except Exception:
+            continue
+        logged_costs[key] = logged_costs.get(key, 0.0) + amount
+    return trade_counts, logged_costs
+
+
+def _unresolved_cost_basis(
+    agent_uuid: str,
+    provider: str,
+    cost_basis: object,
+    markets: dict,
+    logged_costs: dict[tuple[str, str, str], float],
+) -> float:
+    if not isinstance(cost_basis, dict):
+        return 0.0
+    total = 0.0
+    for market_id, costs in cost_basis.items():
+        market = markets.get(str(market_id), {})
+        if bool((market or {}).get("resolved")):
+            continue
+        market_cost_total = 0.0
+        if not isinstance(costs, dict):
+            costs = {}
+        for amount in costs.values():
+            try:
+                market_cost_total += float(amount or 0.0)
+            except Exception:
+                continue
+        if market_cost_total <= 0.0:
+            # Fall back to the cost recorded in the activity log.
+            market_cost_total += logged_costs.get((agent_uuid, provider, str(market_id)), 0.0)
+        total += max(0.0, market_cost_total)
+    return total
+
+
 def leaderboard_rows(limit: int = 200) -> list[dict]:
+    return leaderboard_page(limit)[0]
+
+
+def leaderboard_page(
+    limit: int = 200,
+    after: tuple[float, float, int, str] | None = None,
+) -> tuple[list[dict], bool]:
+    # The `limit` best rows ranked strictly after the `after` sort key (a
+    # leaderboard_sort_key tuple), plus whether more rows follow. Ranks stay
+    # global: rows skipped by the cursor still count.
     rows: list[dict] = []
-    with STATE.lock:
+    with STATE.lock.read():
+        valuations = valuations_for_accounts(STATE.accounts.values())
+        trade_counts, logged_costs = _activity_trade_stats()
         for account in STATE.accounts.values():
-            valuation = valuation_for_account(account)
-            unresolved_poly_cost_basis = 0.0
-            if isinstance(getattr(account, "poly_cost_basis", None), dict):
-                for market_id, costs in account.poly_cost_basis.items():
-                    market = STATE.poly_markets.get(str(market_id), {})
-                    if bool((market or {}).get("resolved")):
-                        continue
-                    market_cost_total = 0.0
-                    if not isinstance(costs, dict):
-                        costs = {}
-                    for amount in costs.values():
-                        try:
-                            market_cost_total += float(amount or 0.0)
-                        except Exception:
-                            continue
-                    if market_cost_total <= 0.0:
-                        for event in STATE.activity_log:
-                            event_type = str(event.get("type", "")).strip().lower()
-                            if event_type not in {"poly_bet", "poly_sell"}:
-                                continue
-                            if str(event.get("agent_uuid", "")).strip() != str(account.agent_uuid):
-                                continue
-                            details = event.get("details") if isinstance(event.get("details"), dict) else {}
-                            if str(details.get("market_id", "")).strip() != str(market_id):
-                                continue
-                            if str(details.get("provider", "poly") or "poly").strip().lower() != "poly":
-                                continue
-                            if event_type == "poly_bet":
-                                try:
-                                    market_cost_total += float(details.get("amount", 0.0) or 0.0)
-                                except Exception:
-                                    continue
-                            else:
-                                try:
-                                    market_cost_total -= float(details.get("released_cost", details.get("lock_amount", 0.0)) or 0.0)
-                                except Exception:
-                                    continue
-                    unresolved_poly_cost_basis += max(0.0, market_cost_total)
-            unresolved_kalshi_cost_basis = 0.0
-            if isinstance(getattr(account, "kalshi_cost_basis", None), dict):
-                for market_id, costs in account.kalshi_cost_basis.items():
-                    market = STATE.kalshi_markets.get(str(market_id), {})
-                    if bool((market or {}).get("resolved")):
-                        continue
-                    market_cost_total = 0.0
-                    if not isinstance(costs, dict):
-                        costs = {}
-                    for amount in costs.values():
-                        try:
-                            market_cost_total += float(amount or 0.0)
-                        except Exception:
-                            continue
-                    if market_cost_total <= 0.0:
-                        for event in STATE.activity_log:
-                            event_type = str(event.get("type", "")).strip().lower()
-                            if event_type not in {"poly_bet", "poly_sell"}:
-                                continue
-                            if str(event.get("agent_uuid", "")).strip() != str(account.agent_uuid):
-                                continue
-                            details = event.get("details") if isinstance(event.get("details"), dict) else {}
-                            if str(details.get("provider", "poly") or "poly").strip().lower() != "kalshi":
-                                continue
-                            if str(details.get("market_id", "")).strip() != str(market_id):
-                                continue
-                            if event_type == "poly_bet":
-                                try:
-                                    market_cost_total += float(details.get("amount", 0.0) or 0.0)
-                                except Exception:
-                                    continue
-                            else:
-                                try:
-                                    market_cost_total -= float(details.get("released_cost", details.get("lock_amount", 0.0)) or 0.0)
-                                except Exception:
-                                    continue
-                    unresolved_kalshi_cost_basis += max(0.0, market_cost_total)
-            settled_pnl = (
-                float(getattr(account, "realized_pnl", 0.0) or 0.0)
-                + float(getattr(account, "poly_realized_pnl", 0.0) or 0.0)
-                + float(getattr(account, "kalshi_realized_pnl", 0.0) or 0.0)
+            valuation = valuations[account.agent_uuid]
+            unresolved_poly_cost_basis = _unresolved_cost_basis(
+                account.agent_uuid, "poly", getattr(account, "poly_cost_basis", None), STATE.poly_markets, logged_costs
             )
-            unresolved_prediction_cost_basis = float(unresolved_poly_cost_basis) + float(unresolved_kalshi_cost_basis)
-            open_pnl = float(valuation["prediction_market_value"]) - unresolved_prediction_cost_basis
-            fee_paid = (
-                max(0.0, float(getattr(account, "poly_fee_paid", 0.0) or 0.0))
-                + max(0.0, float(getattr(account, "kalshi_fee_paid", 0.0) or 0.0))
+            unresolved_kalshi_cost_basis = _unresolved_cost_basis(
+                account.agent_uuid, "kalshi", getattr(account, "kalshi_cost_basis", None), STATE.kalshi_markets, logged_costs
             )
+            # _account_from_dict coerces these numeric fields on load.
+            settled_pnl = account.realized_pnl + account.poly_realized_pnl + account.kalshi_realized_pnl
+            unresolved_prediction_cost_basis = unresolved_poly_cost_basis + unresolved_kalshi_cost_basis
+            open_pnl = valuation["prediction_market_value"] - unresolved_prediction_cost_basis
+            fee_paid = account.poly_fee_paid + account.kalshi_fee_paid
             net_pnl = settled_pnl + open_pnl - fee_paid
-            cash_available = float(valuation["cash"])
-            cash_locked = max(0.0, float(getattr(account, "cash_locked", 0.0) or 0.0))
+            cash_available = valuation["cash"]
+            cash_locked = account.cash_locked
             cash_total = cash_available + cash_locked
             followers = follower_count_for_agent(account.agent_uuid)
-            trade_count = 0
-            for event in STATE.activity_log:
-                if str(event.get("agent_uuid", "")).strip() == account.agent_uuid and str(event.get("type", "")).strip().lower() in {"stock_order", "poly_bet", "poly_sell", "poly_resolved"}:
-                    trade_count += 1
+            trade_count = trade_counts.get(account.agent_uuid, 0)
             win_rate = 50.0
             if trade_count > 0:
                 # deterministic synthetic estimate for public discovery cards
-                win_rate = max(5.0, min(95.0, 50.0 + float(valuation["return_pct"]) * 0.7))
+                win_rate = max(5.0, min(95.0, 50.0 + valuation["return_pct"] * 0.7))
 
+            # Only the sort-key fields are rounded here; the rest are rounded
+            # below for the rows that make the cut.
             rows.append(
                 {
                     "agent_id": account.display_name,
                     "agent_uuid": account.agent_uuid,
                     "avatar": account.avatar,
-                    "cash": round(cash_available, 4),
-                    "cash_available": round(cash_available, 4),
-                    "cash_locked": round(cash_locked, 4),
+                    "cash": cash_available,
+                    "cash_available": cash_available,
+                    "cash_locked": cash_locked,
                     "cash_total": round(cash_total, 4),
-                    "stock_market_value": round(float(valuation["stock_market_value"]), 4),
-                    "crypto_market_value": round(float(valuation["crypto_market_value"]), 4),
-                    "poly_market_value": round(float(valuation["poly_market_value"]), 4),
-                    "kalshi_market_value": round(float(valuation.get("kalshi_market_value", 0.0) or 0.0), 4),
-                    "prediction_market_value": round(float(valuation.get("prediction_market_value", 0.0) or 0.0), 4),
-                    "settled_pnl": round(settled_pnl, 4),
-                    "open_pnl": round(open_pnl, 4),
-                    "fee_paid": round(fee_paid, 4),
-                    "net_pnl": round(net_pnl, 4),
+                    "stock_market_value": valuation["stock_market_value"],
+                    "crypto_market_value": valuation["crypto_market_value"],
+                    "poly_market_value": valuation["poly_market_value"],
+                    "kalshi_market_value": valuation["kalshi_market_value"],
+                    "prediction_market_value": valuation["prediction_market_value"],
+                    "settled_pnl": settled_pnl,
+                    "open_pnl": open_pnl,
+                    "fee_paid": fee_paid,
+                    "net_pnl": net_pnl,
                     "ranking_score": round(net_pnl, 4),
-                    "balance": round(float(valuation["equity"]), 4),
-                    "return_pct": round(float(valuation["return_pct"]), 6),
-                    "followers": int(followers),
-                    "trade_count": int(trade_count),
-                    "win_rate": round(float(win_rate), 2),
-                    "risk_label": risk_label_for_return_pct(float(valuation["return_pct"])),
-                    "symbols": _agent_symbols(account.agent_uuid),
+                    "balance": valuation["equity"],
+                    "return_pct": valuation["return_pct"],
+                    "followers": followers,
+                    "trade_count": trade_count,
+                    "win_rate": win_rate,
+                    "risk_label": risk_label_for_return_pct(valuation["return_pct"]),
                 }
             )
 
-    rows.sort(
-        key=lambda item: (
-            -float(item.get("ranking_score", 0.0)),
-            -float(item.get("cash_total", 0.0)),
-            -int(item.get("followers", 0)),
-            str(item.get("agent_id", "")),
-        )
-    )
-    for idx, row in enumerate(rows, start=1):
+    skipped = 0
+    if after is not None:
+        remaining = [row for row in rows if leaderboard_sort_key(row) > after]
+        skipped = len(rows) - len(remaining)
+        rows = remaining
+    safe_limit = max(1, min(int(limit), 500))
+    has_more = len(rows) > safe_limit
+    # Same order as sorted(rows, key=...)[:limit] without sorting every row.
+    rows = heapq.nsmallest(safe_limit, rows, key=leaderboard_sort_key)
+    # One shared acquire for every selected row's symbols.
+    with STATE.lock.read():
+        for row in rows:
+            row["symbols"] = _agent_symbols_unlocked(row["agent_uuid"])
+    for idx, row in enumerate(rows, start=skipped + 1):
+        for key in _ROUND_4_FIELDS:
+            row[key] = round(row[key], 4)
+        row["return_pct"] = round(row["return_pct"], 6)
+        row["win_rate"] = round(row["win_rate"], 2)
         row["rank"] = idx
-    return rows[: max(1, min(int(limit), 500))]
+    return rows, has_more
 
 
 def discovery_cards(limit: int = 200, symbol: str = "", risk: str = "", tag: str = "") -> list[dict]:
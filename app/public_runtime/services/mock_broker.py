@@ -8,38 +8,35 @@ from typing import Any
 from fastapi import HTTPException
 
 from ...state import STATE
-from .common import resolve_agent_uuid, valuation_for_account
+from .common import event_agent_uuid, resolve_agent_uuid, valuation_for_account
 
 _ORDER_SEQ = itertools.count(1)
-try:
-    _POLY_TAKER_FEE = float(os.getenv("CRAB_POLY_TAKER_FEE", "0.001") or 0.001)
-except (TypeError, ValueError):
-    _POLY_TAKER_FEE = 0.001
-_POLY_TAKER_FEE = max(0.0, min(0.05, _POLY_TAKER_FEE))
-
-try:
-    _POLY_SLIPPAGE = float(os.getenv("CRAB_POLY_SLIPPAGE", "0.003") or 0.003)
-except (TypeError, ValueError):
-    _POLY_SLIPPAGE = 0.003
-_POLY_SLIPPAGE = max(0.0, min(0.2, _POLY_SLIPPAGE))
-
-try:
-    _KALSHI_TAKER_FEE = float(os.getenv("CRAB_KALSHI_TAKER_FEE", "0.001") or 0.001)
-except (TypeError, ValueError):
-    _KALSHI_TAKER_FEE = 0.001
-_KALSHI_TAKER_FEE = max(0.0, min(0.05, _KALSHI_TAKER_FEE))
-
-try:
-    _KALSHI_SLIPPAGE = float(os.getenv("CRAB_KALSHI_SLIPPAGE", "0.003") or 0.003)
-except (TypeError, ValueError):
-    _KALSHI_SLIPPAGE = 0.003
-_KALSHI_SLIPPAGE = max(0.0, min(0.2, _KALSHI_SLIPPAGE))
+
+
+def _env_float(name: str, default: float, *, high: float) -> float:
+    try:
+        value = float(os.getenv(name, "") or default)
+    except (TypeError, ValueError):
+        value = default
+    return max(0.0, min(high, value))
+
+
+_POLY_TAKER_FEE = _env_float("CRAB_POLY_TAKER_FEE", 0.001, high=0.05)
+_POLY_SLIPPAGE = _env_float("CRAB_POLY_SLIPPAGE", 0.003, high=0.2)
+_KALSHI_TAKER_FEE = _env_float("CRAB_KALSHI_TAKER_FEE", 0.001, high=0.05)
+_KALSHI_SLIPPAGE = _env_float("CRAB_KALSHI_SLIPPAGE", 0.003, high=0.2)
 
 
 def _synthetic_price(symbol: str) -> float:
     s = str(symbol or "").strip().upper()
     if not s:
         raise HTTPException(status_code=400, detail="invalid_symbol")
+    # Cached prices are the common case; serve them from the shared side and
+    # take the writer lock only to create a missing price.
+    with STATE.lock.read():
+        cached = float(STATE.stock_prices.get(s, 0.0) or 0.0)
+    if cached > 0:
+        return cached
     with STATE.lock:
         cached = float(STATE.stock_prices.get(s, 0.0) or 0.0)
         if cached > 0:
@@ -47,7 +44,8 @@ def _synthetic_price(symbol: str) -> float:
         seed = sum((idx + 1) * ord(ch) for idx, ch in enumerate(s))
         px = round(5.0 + (seed % 6000) / 20.0, 4)
         STATE.stock_prices[s] = px
-        STATE.save_runtime_state()
+        STATE.invalidate_valuations()
+        STATE.request_save()
         return px
 
 
@@ -55,7 +53,7 @@ def get_quote(symbol: str) -> dict[str, Any]:
     s = str(symbol or "").strip().upper()
     if not s:
         raise HTTPException(status_code=400, detail="invalid_symbol")
-    with STATE.lock:
+    with STATE.lock.read():
         had_cache = float(STATE.stock_prices.get(s, 0.0) or 0.0) > 0
     price = _synthetic_price(s)
     return {
@@ -119,6 +117,8 @@ def place_market_order(*, agent_uuid: str, symbol: str, side: str, qty: float) -
             else:
                 account.positions[safe_symbol] = float(new_qty)
 
+        STATE.invalidate_valuations(resolved_uuid)
+
         event = STATE.record_operation(
             "stock_order",
             agent_uuid=resolved_uuid,
@@ -135,7 +135,7 @@ def place_market_order(*, agent_uuid: str, symbol: str, side: str, qty: float) -
                 "execution_mode": "mock",
             },
         )
-        STATE.save_runtime_state()
+        STATE.request_save()
 
         valuation = valuation_for_account(account)
 
@@ -162,35 +162,56 @@ def place_market_order(*, agent_uuid: str, symbol: str, side: str, qty: float) -
     }
 
 
+def _order_history_row(event: dict[str, Any]) -> dict[str, Any]:
+    details = event.get("details") if isinstance(event.get("details"), dict) else {}
+    return {
+        "order_id": str(details.get("order_id", "") or f"EVENT-{event.get('id', 0)}"),
+        "id": int(event.get("id", 0) or 0),
+        "created_at": str(event.get("created_at", "") or ""),
+        "symbol": str(details.get("symbol", "")).upper(),
+        "side": str(details.get("side", "")).upper(),
+        "qty": float(details.get("qty", 0.0) or 0.0),
+        "fill_price": float(details.get("fill_price", 0.0) or 0.0),
+        "notional": float(details.get("notional", 0.0) or 0.0),
+        "status": str(details.get("status", "FILLED") or "FILLED"),
+        "effective_action": str(details.get("effective_action", "") or ""),
+        "execution_mode": "mock",
+    }
+
+
 def list_order_history(agent_uuid: str, limit: int = 50) -> list[dict[str, Any]]:
     resolved_uuid = resolve_agent_uuid(agent_uuid)
     if not resolved_uuid:
         return []
+    safe_limit = max(1, min(int(limit), 200))
     rows: list[dict[str, Any]] = []
-    with STATE.lock:
+    with STATE.lock.read():
+        # The per-agent trade index holds this agent's newest trade events in
+        # log order, so most requests never touch the shared activity_log.
+        indexed = STATE.trade_events_by_agent.get(resolved_uuid)
+        if not indexed:
+            return rows
+        for event in reversed(indexed):
+            if event.get("type") != "stock_order":
+                continue
+            rows.append(_order_history_row(event))
+            if len(rows) >= safe_limit:
+                return rows
+        if len(indexed) < (indexed.maxlen or 0):
+            # Never truncated, so the index already held every trade event.
+            return rows
+        # Full index: older stock orders may still be in the log.
+        oldest_indexed_id = int(indexed[0].get("id", 0) or 0)
         for event in reversed(STATE.activity_log):
-            if str(event.get("type", "")).strip().lower() != "stock_order":
+            if int(event.get("id", 0) or 0) >= oldest_indexed_id:
                 continue
-            actor = str(event.get("agent_uuid", "")).strip() or resolve_agent_uuid(str(event.get("agent_id", "")))
+            if event.get("type") != "stock_order":
+                continue
+            actor = event_agent_uuid(event)
             if actor != resolved_uuid:
                 continue
-            details = event.get("details") if isinstance(event.get("details"), dict) else {}
-            rows.append(
-                {
-                    "order_id": str(details.get("order_id", "") or f"EVENT-{event.get('id', 0)}"),
-                    "id": int(event.get("id", 0) or 0),
-                    "created_at": str(event.get("created_at", "") or ""),
-                    "symbol": str(details.get("symbol", "")).upper(),
-                    "side": str(details.get("side", "")).upper(),
-                    "qty": float(details.get("qty", 0.0) or 0.0),
-                    "fill_price": float(details.get("fill_price", 0.0) or 0.0),
-                    "notional": float(details.get("notional", 0.0) or 0.0),
-                    "status": str(details.get("status", "FILLED") or "FILLED"),
-                    "effective_action": str(details.get("effective_action", "") or ""),
-                    "execution_mode": "mock",
-                }
-            )
-            if len(rows) >= max(1, min(int(limit), 200)):
+            rows.append(_order_history_row(event))
+            if len(rows) >= safe_limit:
                 break
     return rows
 
@@ -212,7 +233,7 @@ def cancel_order(*, agent_uuid: str, order_id: str) -> dict[str, Any]:
 
 
 def list_poly_markets() -> list[dict[str, Any]]:
-    with STATE.lock:
+    with STATE.lock.read():
         rows = [dict(item) for item in STATE.poly_markets.values() if isinstance(item, dict)]
     for row in rows:
         row.setdefault("resolved", False)
@@ -284,6 +305,8 @@ def place_poly_bet(*, agent_uuid: str, market_id: str, outcome: str, amount: flo
         account.poly_cost_basis[safe_market_id][safe_outcome] = float(account.poly_cost_basis[safe_market_id].get(safe_outcome, 0.0) or 0.0) + safe_amount
         account.poly_fee_by_market[safe_market_id] = float(account.poly_fee_by_market.get(safe_market_id, 0.0) or 0.0) + fee
 
+        STATE.invalidate_valuations(resolved_uuid)
+
         event = STATE.record_operation(
             "poly_bet",
             agent_uuid=resolved_uuid,
@@ -303,7 +326,7 @@ def place_poly_bet(*, agent_uuid: str, market_id: str, outcome: str, amount: flo
                 "execution_mode": "mock",
             },
         )
-        STATE.save_runtime_state()
+        STATE.request_save()
 
     return {
         "execution_mode": "mock",
@@ -433,6 +456,8 @@ def place_poly_sell(*, agent_uuid: str, market_id: str, outcome: str, shares: fl
             if not has_cost:
                 account.poly_cost_basis.pop(safe_market_id, None)
 
+        STATE.invalidate_valuations(resolved_uuid)
+
         event = STATE.record_operation(
             "poly_sell",
             agent_uuid=resolved_uuid,
@@ -456,7 +481,7 @@ def place_poly_sell(*, agent_uuid: str, market_id: str, outcome: str, shares: fl
                 "execution_mode": "mock",
             },
         )
-        STATE.save_runtime_state()
+        STATE.request_save()
 
     return {
         "execution_mode": "mock",
@@ -510,7 +535,7 @@ def _resolve_kalshi_market_unlocked(raw_market_input: str) -> tuple[str, dict[st
 
 
 def list_kalshi_markets() -> list[dict[str, Any]]:
-    with STATE.lock:
+    with STATE.lock.read():
         rows = [dict(item) for item in STATE.kalshi_markets.values() if isinstance(item, dict)]
     for row in rows:
         row.setdefault("status", "open")
@@ -580,6 +605,8 @@ def place_kalshi_bet(*, agent_uuid: str, market_id: str, outcome: str, amount: f
         account.kalshi_cost_basis[safe_market_id][safe_outcome] = float(account.kalshi_cost_basis[safe_market_id].get(safe_outcome, 0.0) or 0.0) + safe_amount
         account.kalshi_fee_by_market[safe_market_id] = float(account.kalshi_fee_by_market.get(safe_market_id, 0.0) or 0.0) + fee
 
+        STATE.invalidate_valuations(resolved_uuid)
+
         ticker = str(market.get("ticker", "") or safe_market_id).strip().upper()
         event = STATE.record_operation(
             "poly_bet",
@@ -601,7 +628,7 @@ def place_kalshi_bet(*, agent_uuid: str, market_id: str, outcome: str, amount: f
                 "execution_mode": "mock",
             },
         )
-        STATE.save_runtime_state()
+        STATE.request_save()
 
     return {
         "execution_mode": "mock",
@@ -724,6 +751,8 @@ def place_kalshi_sell(*, agent_uuid: str, market_id: str, outcome: str, shares:
             if not has_cost:
                 account.kalshi_cost_basis.pop(safe_market_id, None)
 
+        STATE.invalidate_valuations(resolved_uuid)
+
         ticker = str(market.get("ticker", "") or safe_market_id).strip().upper()
         event = STATE.record_operation(
             "poly_sell",
@@ -749,7 +778,7 @@ def place_kalshi_sell(*, agent_uuid: str, market_id: str, outcome: str, shares:
                 "execution_mode": "mock",
             },
         )
-        STATE.save_runtime_state()
+        STATE.request_save()
 
     return {
         "execution_mode": "mock",
@@ -1,14 +1,23 @@
 from __future__ import annotations
 
+import atexit
+from bisect import bisect_right
+import itertools
 import json
+import logging
 import os
+import sys
+from collections import deque
 import sqlite3
+import time
 import secrets
 import hashlib
+import hmac
+from contextlib import contextmanager
 from dataclasses import asdict, dataclass, field
 from datetime import datetime, timezone
 from pathlib import Path
-from threading import RLock
+from threading import Condition, Event, Lock, Thread, get_ident, local
 from typing import Any, Dict, Optional
 from uuid import UUID, uuid4
 
@@ -26,6 +35,128 @@ def _is_uuid_like(value: str) -> bool:
         return False
 
 
+def _iso_to_epoch(value: str) -> float:
+    try:
+        dt = datetime.fromisoformat(str(value or "").strip())
+    except ValueError:
+        return 0.0
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
+
+def _event_type(value: object) -> str:
+    # Event types are stored lower-cased and interned, so scans over
+    # activity_log compare them as-is (equal interned strings hit `is`).
+    return sys.intern(str(value or "").strip().lower())
+
+
+def _forum_post_order(post: dict) -> tuple[str, int]:
+    return post["created_at"], post["post_id"]
+
+
+TRADE_EVENT_TYPES = frozenset({"stock_order", "poly_bet", "poly_sell", "poly_resolved"})
+# Per-agent trade index depth; matches the largest public recent-trades page.
+_TRADE_INDEX_PER_AGENT = 500
+# activity_log keeps only the most recent events.
+_ACTIVITY_LOG_LIMIT = 5000
+# request_save() batches mutations landing within this window into one write.
+_SAVE_COALESCE_SECONDS = 0.25
+# Failed saves back off up to this delay; failures are logged at most once
+# per _SAVE_FAILURE_LOG_SECONDS.
+_SAVE_RETRY_MAX_SECONDS = 30.0
+_SAVE_FAILURE_LOG_SECONDS = 60.0
+
+logger = logging.getLogger(__name__)
+
+
+class StateLock:
+    # Reader/writer lock for TradingState. `with STATE.lock:` keeps its old
+    # exclusive (and reentrant) meaning for writers; read-only paths use
+    # `with STATE.lock.read():` so concurrent GETs no longer serialize.
+    # Waiting writers block new readers to avoid writer starvation. A thread
+    # holding only the read side must not take the write side.
+
+    def __init__(self) -> None:
+        self._cond = Condition(Lock())
+        self._readers = 0
+        self._writer: Optional[int] = None
+        self._writer_depth = 0
+        self._writers_waiting = 0
+        self._local = local()
+
+    def acquire(self) -> bool:
+        me = get_ident()
+        with self._cond:
+            if self._writer == me:
+                self._writer_depth += 1
+                return True
+            if getattr(self._local, "read_depth", 0):
+                raise RuntimeError("state_lock_upgrade_not_supported")
+            self._writers_waiting += 1
+            try:
+                while self._writer is not None or self._readers:
+                    self._cond.wait()
+            finally:
+                self._writers_waiting -= 1
+            self._writer = me
+            self._writer_depth = 1
+            return True
+
+    def release(self) -> None:
+        with self._cond:
+            if self._writer != get_ident():
+                raise RuntimeError("state_lock_not_owned")
+            self._writer_depth -= 1
+            if not self._writer_depth:
+                self._writer = None
+                self._cond.notify_all()
+
+    def __enter__(self) -> "StateLock":
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.release()
+
+    def acquire_read(self) -> None:
+        depth = getattr(self._local, "read_depth", 0)
+        if depth:
+            self._local.read_depth = depth + 1
+            return
+        if self._writer == get_ident():
+            # Writers may read freely; nothing to count.
+            self._local.read_depth = 1
+            self._local.read_counted = False
+            return
+        with self._cond:
+            while self._writer is not None or self._writers_waiting:
+                self._cond.wait()
+            self._readers += 1
+        self._local.read_depth = 1
+        self._local.read_counted = True
+
+    def release_read(self) -> None:
+        depth = getattr(self._local, "read_depth", 0) - 1
+        if depth < 0:
+            raise RuntimeError("state_lock_not_owned")
+        self._local.read_depth = depth
+        if depth or not self._local.read_counted:
+            return
+        with self._cond:
+            self._readers -= 1
+            if not self._readers:
+                self._cond.notify_all()
+
+    @contextmanager
+    def read(self):
+        self.acquire_read()
+        try:
+            yield self
+        finally:
+            self.release_read()
+
+
 @dataclass
 class AgentAccount:
     agent_uuid: str
@@ -110,7 +241,7 @@ class QuickHandoverCallback:
 
 class TradingState:
     def __init__(self) -> None:
-        self.lock = RLock()
+        self.lock = StateLock()
         self.state_file = Path(
             os.getenv("CRAB_STATE_FILE", "~/.local/share/crab-trading/runtime_state.json")
         ).expanduser()
@@ -126,10 +257,14 @@ class TradingState:
         self.agent_name_to_uuid: Dict[str, str] = {}
         self.agent_keys: Dict[str, str] = {}
         self.key_to_agent: Dict[str, str] = {}
+        # Not persisted: blake2b(api_key) -> (api_key, agent_uuid), see agent_for_api_key.
+        self.key_hash_to_agent: Dict[bytes, tuple[str, str]] = {}
         self.prices: Dict[str, float] = {"BTCUSDT": 45000.0, "ETHUSDT": 2500.0}
         self.risk_config = RiskConfig()
         self.forum_posts: list[dict] = []
         self.next_forum_post_id: int = 1
+        # Not persisted: symbol -> number of forum_posts with that symbol.
+        self.forum_post_counts: Dict[str, int] = {}
         self.forum_comments: list[dict] = []
         self.next_forum_comment_id: int = 1
         self.registration_challenges: Dict[str, dict] = {}
@@ -216,9 +351,29 @@ class TradingState:
                 "source": "kalshi_demo",
             },
         }
-        self.activity_log: list[dict] = []
+        self.activity_log: deque = deque(maxlen=_ACTIVITY_LOG_LIMIT)
         self.next_activity_id: int = 1
+        # Not persisted: agent_uuid -> most recent trade events (refs into activity_log).
+        self.trade_events_by_agent: Dict[str, deque] = {}
         self.test_agents: set[str] = set()
+        # Not persisted: agent_uuid -> (valuation_epoch, valuation payload).
+        self.valuation_epoch: int = 0
+        self.valuation_cache: Dict[str, tuple[int, dict]] = {}
+        # Not persisted: deferred-save flag and the flusher thread serving it.
+        self._save_requested = Event()
+        self._save_flusher: Optional[Thread] = None
+        self._save_flusher_guard = Lock()
+        # Held for a whole flush (flag check through write), so a shutdown
+        # flush waits for a write the flusher thread already started.
+        self._save_flush_lock = Lock()
+        self._save_failures = 0
+        self._save_failure_logged_at = 0.0
+        # Snapshots are numbered under the lock; the sqlite write happens
+        # outside it and never replaces a newer snapshot with an older one.
+        self._save_seq = itertools.count(1)
+        self._save_write_lock = Lock()
+        self._save_written_seq = 0
+        atexit.register(self.flush_pending_save)
         self._load_runtime_state()
 
     def _sqlite_connect_unlocked(self) -> sqlite3.Connection:
@@ -258,7 +413,7 @@ class TradingState:
         finally:
             conn.close()
 
-    def _sqlite_save_payload_unlocked(self, payload: dict) -> None:
+    def _sqlite_save_payload_unlocked(self, payload_json: str) -> None:
         self._sqlite_init_schema_unlocked()
         conn = self._sqlite_connect_unlocked()
         try:
@@ -270,10 +425,7 @@ class TradingState:
                     payload=excluded.payload,
                     updated_at=excluded.updated_at
                 """,
-                (
-                    json.dumps(payload, ensure_ascii=False),
-                    datetime.now(timezone.utc).isoformat(),
-                ),
+                (payload_json, datetime.now(timezone.utc).isoformat()),
             )
             conn.commit()
         finally:
@@ -401,7 +553,7 @@ class TradingState:
             description=str(payload.get("description", "") or payload.get("about", "") or "").strip(),
             strategy_summary=str(payload.get("strategy_summary", "") or "").strip(),
             strategy_summary_day=str(payload.get("strategy_summary_day", "") or "").strip(),
-            cash=float(payload.get("cash", 0.0)),
+            cash=float(payload.get("cash", 0.0) or 0.0),
             avatar=avatar,
             trading_code=trading_code,
             trading_code_language=trading_code_language,
@@ -410,18 +562,18 @@ class TradingState:
             is_test=bool(payload.get("is_test", False)),
             positions=dict(payload.get("positions", {})),
             avg_cost=dict(payload.get("avg_cost", {})),
-            realized_pnl=float(payload.get("realized_pnl", 0.0)),
+            realized_pnl=float(payload.get("realized_pnl", 0.0) or 0.0),
             cash_locked=max(0.0, float(payload.get("cash_locked", 0.0) or 0.0)),
             poly_positions=poly_positions,
             poly_cost_basis=poly_cost_basis,
             poly_fee_by_market=poly_fee_by_market,
             poly_fee_paid=max(0.0, float(payload.get("poly_fee_paid", 0.0) or 0.0)),
-            poly_realized_pnl=float(payload.get("poly_realized_pnl", 0.0)),
+            poly_realized_pnl=float(payload.get("poly_realized_pnl", 0.0) or 0.0),
             kalshi_positions=kalshi_positions,
             kalshi_cost_basis=kalshi_cost_basis,
             kalshi_fee_by_market=kalshi_fee_by_market,
             kalshi_fee_paid=max(0.0, float(payload.get("kalshi_fee_paid", 0.0) or 0.0)),
-            kalshi_realized_pnl=float(payload.get("kalshi_realized_pnl", 0.0)),
+            kalshi_realized_pnl=float(payload.get("kalshi_realized_pnl", 0.0) or 0.0),
             blocked=bool(payload.get("blocked", False)),
         )
 
@@ -470,6 +622,50 @@ class TradingState:
                 continue
         return max(max_id + 1, 1)
 
+    def _normalize_forum_posts_unlocked(self) -> None:
+        # Coerce persisted posts to the shape create_forum_post writes so
+        # readers can use fields without re-stringifying, and keep the list in
+        # (created_at, post_id) order so they can page newest-first without
+        # sorting; post_id breaks created_at ties for the keyset cursor.
+        for post in self.forum_posts:
+            for key in ("agent_id", "agent_uuid", "avatar", "title", "content", "created_at"):
+                post[key] = str(post.get(key, "") or "").strip()
+            post["symbol"] = str(post.get("symbol", "") or "").strip().upper()
+            for key in ("post_id", "likes", "comments_count"):
+                try:
+                    post[key] = int(post.get(key, 0) or 0)
+                except (TypeError, ValueError):
+                    post[key] = 0
+        self.forum_posts.sort(key=_forum_post_order)
+        self.reindex_forum_posts_unlocked()
+
+    def reindex_forum_posts_unlocked(self) -> None:
+        counts: Dict[str, int] = {}
+        for post in self.forum_posts:
+            symbol = post.get("symbol", "")
+            counts[symbol] = counts.get(symbol, 0) + 1
+        self.forum_post_counts = counts
+
+    def add_forum_post_unlocked(self, post: dict) -> None:
+        posts = self.forum_posts
+        if posts and _forum_post_order(post) < _forum_post_order(posts[-1]):
+            # Only if the clock stepped back; keep the list ordered.
+            posts.insert(bisect_right(posts, _forum_post_order(post), key=_forum_post_order), post)
+        else:
+            posts.append(post)
+        symbol = post["symbol"]
+        self.forum_post_counts[symbol] = self.forum_post_counts.get(symbol, 0) + 1
+
+    def pop_forum_post_unlocked(self, idx: int) -> dict:
+        post = self.forum_posts.pop(idx)
+        symbol = post["symbol"]
+        remaining = self.forum_post_counts.get(symbol, 0) - 1
+        if remaining > 0:
+            self.forum_post_counts[symbol] = remaining
+        else:
+            self.forum_post_counts.pop(symbol, None)
+        return post
+
     def _load_forum_fallback_only(self) -> None:
         if not self.forum_fallback_file.exists():
             return
@@ -477,6 +673,7 @@ class TradingState:
         posts = raw.get("forum_posts", [])
         if isinstance(posts, list):
             self.forum_posts = [p for p in posts if isinstance(p, dict)]
+            self._normalize_forum_posts_unlocked()
             self.next_forum_post_id = int(raw.get("next_forum_post_id", 0)) or self._derive_next_forum_post_id()
 
     def _load_runtime_state(self) -> None:
@@ -805,8 +1002,10 @@ class TradingState:
                 posts = raw.get("forum_posts", [])
                 if isinstance(posts, list):
                     self.forum_posts = [p for p in posts if isinstance(p, dict)]
+                    self._normalize_forum_posts_unlocked()
                 else:
                     self.forum_posts = []
+                    self.forum_post_counts = {}
                 next_post_id = raw.get("next_forum_post_id")
                 if isinstance(next_post_id, int) and next_post_id > 0:
                     self.next_forum_post_id = next_post_id
@@ -826,9 +1025,9 @@ class TradingState:
 
                 events = raw.get("activity_log", [])
                 if isinstance(events, list):
-                    self.activity_log = [e for e in events if isinstance(e, dict)]
+                    self.activity_log = deque((e for e in events if isinstance(e, dict)), maxlen=_ACTIVITY_LOG_LIMIT)
                 else:
-                    self.activity_log = []
+                    self.activity_log = deque(maxlen=_ACTIVITY_LOG_LIMIT)
                 next_event_id = raw.get("next_activity_id")
                 if isinstance(next_event_id, int) and next_event_id > 0:
                     self.next_activity_id = next_event_id
@@ -836,44 +1035,26 @@ class TradingState:
                     self.next_activity_id = self._derive_next_activity_id()
 
                 # Migrate forum/posts/comments/events to include UUID + latest display names.
-                for post in self.forum_posts:
-                    agent_uuid = str(post.get("agent_uuid", "")).strip()
-                    if not agent_uuid:
-                        agent_uuid = resolve_uuid(str(post.get("agent_id", ""))) or ""
-                        if agent_uuid:
-                            post["agent_uuid"] = agent_uuid
-                            migration_changed = True
-                    if agent_uuid and agent_uuid in self.accounts:
-                        display_name = self.accounts[agent_uuid].display_name
-                        if str(post.get("agent_id", "")).strip() != display_name:
-                            post["agent_id"] = display_name
-                            migration_changed = True
-
-                for comment in self.forum_comments:
-                    agent_uuid = str(comment.get("agent_uuid", "")).strip()
-                    if not agent_uuid:
-                        agent_uuid = resolve_uuid(str(comment.get("agent_id", ""))) or ""
-                        if agent_uuid:
-                            comment["agent_uuid"] = agent_uuid
-                            migration_changed = True
-                    if agent_uuid and agent_uuid in self.accounts:
-                        display_name = self.accounts[agent_uuid].display_name
-                        if str(comment.get("agent_id", "")).strip() != display_name:
-                            comment["agent_id"] = display_name
-                            migration_changed = True
+                accounts = self.accounts
+                for rows in (self.forum_posts, self.forum_comments, self.activity_log):
+                    for row in rows:
+                        agent_uuid = str(row.get("agent_uuid", "")).strip()
+                        if not agent_uuid:
+                            agent_uuid = resolve_uuid(str(row.get("agent_id", ""))) or ""
+                            if agent_uuid:
+                                row["agent_uuid"] = agent_uuid
+                                migration_changed = True
+                        account = accounts.get(agent_uuid) if agent_uuid else None
+                        if account is not None:
+                            display_name = account.display_name
+                            if str(row.get("agent_id", "")).strip() != display_name:
+                                row["agent_id"] = display_name
+                                migration_changed = True
 
                 for event in self.activity_log:
-                    agent_uuid = str(event.get("agent_uuid", "")).strip()
-                    if not agent_uuid:
-                        agent_uuid = resolve_uuid(str(event.get("agent_id", ""))) or ""
-                        if agent_uuid:
-                            event["agent_uuid"] = agent_uuid
-                            migration_changed = True
-                    if agent_uuid and agent_uuid in self.accounts:
-                        display_name = self.accounts[agent_uuid].display_name
-                        if str(event.get("agent_id", "")).strip() != display_name:
-                            event["agent_id"] = display_name
-                            migration_changed = True
+                    event["type"] = _event_type(event.get("type"))
+                    if not isinstance(event.get("created_ts"), (int, float)):
+                        event["created_ts"] = _iso_to_epoch(str(event.get("created_at", "") or ""))
 
                 for agent_uuid, account in self.accounts.items():
                     if not isinstance(account.poly_cost_basis, dict):
@@ -1023,12 +1204,13 @@ class TradingState:
                         agent_uuid = str(comment.get("agent_uuid", "")).strip()
                         if agent_uuid:
                             self.test_agents.add(agent_uuid)
+                self.reindex_trade_events_unlocked()
+                self.reindex_api_keys_unlocked()
 
                 if migration_changed:
-                    try:
-                        self.save_runtime_state()
-                    except Exception:
-                        pass
+                    # The migrated state is already live in memory; persist it
+                    # off the import path.
+                    self.request_save()
                 elif migrated_from_json:
                     # One-time migration path: persist prior JSON state into SQLite.
                     try:
@@ -1041,6 +1223,7 @@ class TradingState:
                 self.agent_name_to_uuid = {}
                 self.agent_keys = {}
                 self.key_to_agent = {}
+                self.key_hash_to_agent = {}
                 self.registration_challenges = {}
                 self.pending_by_agent = {}
                 self.registration_by_api_key = {}
@@ -1054,12 +1237,73 @@ class TradingState:
                 self.openclaw_nonces = {}
                 self.forum_posts = []
                 self.next_forum_post_id = 1
+                self.forum_post_counts = {}
                 self.forum_comments = []
                 self.next_forum_comment_id = 1
-                self.activity_log = []
+                self.activity_log = deque(maxlen=_ACTIVITY_LOG_LIMIT)
                 self.next_activity_id = 1
+                self.trade_events_by_agent = {}
                 self.test_agents = set()
 
+    def _trade_event_agent_unlocked(self, event: dict) -> str:
+        if event.get("type") not in TRADE_EVENT_TYPES:
+            return ""
+        return str(event.get("agent_uuid", "")).strip() or str(
+            self._resolve_agent_uuid_unlocked(str(event.get("agent_id", ""))) or ""
+        )
+
+    def _index_trade_event_unlocked(self, event: dict) -> None:
+        agent_uuid = self._trade_event_agent_unlocked(event)
+        if not agent_uuid:
+            return
+        bucket = self.trade_events_by_agent.get(agent_uuid)
+        if bucket is None:
+            bucket = deque(maxlen=_TRADE_INDEX_PER_AGENT)
+            self.trade_events_by_agent[agent_uuid] = bucket
+        bucket.append(event)
+
+    def _unindex_trade_event_unlocked(self, event: dict) -> None:
+        # Only the oldest indexed event can age out of activity_log.
+        agent_uuid = self._trade_event_agent_unlocked(event)
+        bucket = self.trade_events_by_agent.get(agent_uuid)
+        if bucket and bucket[0] is event:
+            bucket.popleft()
+            if not bucket:
+                self.trade_events_by_agent.pop(agent_uuid, None)
+
+    def reindex_trade_events_unlocked(self) -> None:
+        self.trade_events_by_agent = {}
+        for event in self.activity_log:
+            if isinstance(event, dict):
+                self._index_trade_event_unlocked(event)
+
+    @staticmethod
+    def _api_key_digest(api_key: str) -> bytes:
+        return hashlib.blake2b(str(api_key).encode("utf-8"), digest_size=16).digest()
+
+    def bind_api_key_unlocked(self, api_key: str, agent_uuid: str) -> None:
+        self.key_to_agent[api_key] = agent_uuid
+        self.key_hash_to_agent[self._api_key_digest(api_key)] = (api_key, agent_uuid)
+
+    def reindex_api_keys_unlocked(self) -> None:
+        self.key_hash_to_agent = {
+            self._api_key_digest(api_key): (api_key, agent_uuid) for api_key, agent_uuid in self.key_to_agent.items()
+        }
+
+    def agent_for_api_key(self, token: str) -> str:
+        # Look up by digest, then confirm the full key in constant time, so
+        # the dict probe never compares attacker-supplied key text directly.
+        # No lock: require_agent runs on the event loop, and a single dict
+        # get is atomic under the GIL (writers only add or swap whole entries).
+        digest = self._api_key_digest(token)
+        entry = self.key_hash_to_agent.get(digest)
+        if entry is None:
+            return ""
+        api_key, agent_uuid = entry
+        if not hmac.compare_digest(api_key.encode("utf-8"), str(token).encode("utf-8")):
+            return ""
+        return agent_uuid
+
     def _resolve_agent_uuid_unlocked(self, identifier: str) -> Optional[str]:
         ident = str(identifier or "").strip()
         if not ident:
@@ -1069,17 +1313,27 @@ class TradingState:
         return self.agent_name_to_uuid.get(ident)
 
     def resolve_agent_uuid(self, identifier: str) -> Optional[str]:
-        with self.lock:
+        with self.lock.read():
             return self._resolve_agent_uuid_unlocked(identifier)
 
     def display_name_for(self, identifier: str) -> str:
-        with self.lock:
+        with self.lock.read():
             agent_uuid = self._resolve_agent_uuid_unlocked(identifier)
             if not agent_uuid:
                 return str(identifier or "").strip()
             account = self.accounts.get(agent_uuid)
             return account.display_name if account else str(identifier or "").strip()
 
+    def invalidate_valuations(self, agent_uuid: str = "") -> None:
+        # Drop one account's cached valuation after it trades, or every
+        # cached valuation (no argument) after prices or markets change.
+        with self.lock:
+            if agent_uuid:
+                self.valuation_cache.pop(str(agent_uuid), None)
+            else:
+                self.valuation_epoch += 1
+                self.valuation_cache.clear()
+
     def record_operation(
         self,
         op_type: str,
@@ -1094,22 +1348,70 @@ class TradingState:
                 account = self.accounts.get(normalized_uuid)
                 if account:
                     display_name = account.display_name
+            now = datetime.now(timezone.utc)
             event = {
                 "id": self.next_activity_id,
-                "type": op_type,
+                "type": _event_type(op_type),
                 "agent_uuid": normalized_uuid,
                 "agent_id": display_name,
                 "details": details or {},
-                "created_at": datetime.now(timezone.utc).isoformat(),
+                "created_at": now.isoformat(),
+                "created_ts": now.timestamp(),
             }
             self.next_activity_id += 1
+            if len(self.activity_log) == self.activity_log.maxlen:
+                # append() below evicts the oldest event.
+                self._unindex_trade_event_unlocked(self.activity_log[0])
             self.activity_log.append(event)
-            if len(self.activity_log) > 5000:
-                self.activity_log = self.activity_log[-5000:]
+            self._index_trade_event_unlocked(event)
             return event
 
+    def request_save(self) -> None:
+        # Mark state dirty; the flusher thread writes it once per coalescing
+        # window. Callers may hold the lock: the write waits for it.
+        self._save_requested.set()
+        if self._save_flusher is None:
+            with self._save_flusher_guard:
+                if self._save_flusher is None:
+                    self._save_flusher = Thread(target=self._save_flusher_loop, name="crab-state-flusher", daemon=True)
+                    self._save_flusher.start()
+
+    def _save_flusher_loop(self) -> None:
+        delay = _SAVE_COALESCE_SECONDS
+        while True:
+            self._save_requested.wait()
+            time.sleep(delay)
+            if self.flush_pending_save():
+                delay = _SAVE_COALESCE_SECONDS
+            else:
+                delay = min(delay * 2, _SAVE_RETRY_MAX_SECONDS)
+
+    def flush_pending_save(self) -> bool:
+        # Returns False when the write failed; the state stays dirty so the
+        # flusher (or the next shutdown flush) retries it.
+        with self._save_flush_lock:
+            if not self._save_requested.is_set():
+                return True
+            self._save_requested.clear()
+            try:
+                self.save_runtime_state()
+            except Exception:
+                self._save_requested.set()
+                self._save_failures += 1
+                now = time.monotonic()
+                if self._save_failures == 1 or now - self._save_failure_logged_at >= _SAVE_FAILURE_LOG_SECONDS:
+                    self._save_failure_logged_at = now
+                    logger.exception("state save failed (%d consecutive failures); retrying", self._save_failures)
+                return False
+            if self._save_failures:
+                logger.warning("state save recovered after %d failed attempts", self._save_failures)
+                self._save_failures = 0
+            return True
+
     def save_runtime_state(self) -> None:
-        with self.lock:
+        # Only serialization needs the state; the shared side keeps readers
+        # going and the sqlite write below runs without the lock.
+        with self.lock.read():
             payload = {
                 "version": 6,
                 "accounts": {agent_uuid: asdict(account) for agent_uuid, account in self.accounts.items()},
@@ -1135,11 +1437,20 @@ class TradingState:
                 "stock_prices": self.stock_prices,
                 "poly_markets": self.poly_markets,
                 "kalshi_markets": self.kalshi_markets,
-                "activity_log": self.activity_log,
+                "activity_log": list(self.activity_log),
                 "next_activity_id": self.next_activity_id,
                 "test_agents": sorted(self.test_agents),
             }
-            self._sqlite_save_payload_unlocked(payload)
+            # Compact separators and no circular-reference walk: the
+            # payload is plain JSON data rebuilt on every save.
+            payload_json = json.dumps(payload, ensure_ascii=False, check_circular=False, separators=(",", ":"))
+            seq = next(self._save_seq)
+        with self._save_write_lock:
+            if seq <= self._save_written_seq:
+                # A newer snapshot has already been written.
+                return
+            self._sqlite_save_payload_unlocked(payload_json)
+            self._save_written_seq = seq
 
     @staticmethod
     def _quick_handover_token_hash(token: str) -> str:
@@ -38,6 +38,7 @@ def _reset_state() -> None:
         STATE.agent_name_to_uuid = {}
         STATE.agent_keys = {}
         STATE.key_to_agent = {}
+        STATE.key_hash_to_agent = {}
         STATE.registration_challenges = {}
         STATE.pending_by_agent = {}
         STATE.registration_by_api_key = {}
@@ -52,10 +53,12 @@ def _reset_state() -> None:
         STATE.openclaw_nonces = {}
         STATE.forum_posts = []
         STATE.next_forum_post_id = 1
+        STATE.forum_post_counts = {}
         STATE.forum_comments = []
         STATE.next_forum_comment_id = 1
-        STATE.activity_log = []
+        STATE.activity_log.clear()
         STATE.next_activity_id = 1
+        STATE.trade_events_by_agent = {}
         STATE.test_agents = set()
 
 
@@ -89,7 +92,7 @@ def _seed_accounts(rng: random.Random, agents_payload: dict, seed: int) -> list[
             STATE.accounts[agent_uuid] = account
             STATE.agent_name_to_uuid[name] = agent_uuid
             STATE.agent_keys[agent_uuid] = api_key
-            STATE.key_to_agent[api_key] = agent_uuid
+            STATE.bind_api_key_unlocked(api_key, agent_uuid)
             STATE.record_operation("agent_registered", agent_uuid=agent_uuid, details={"source": "seed"}, agent_id=name)
             uuids.append(agent_uuid)
 
@@ -130,6 +133,7 @@ def _seed_prices_and_markets(prices_payload: dict, markets_payload: dict) -> tup
             STATE.stock_prices = {str(k).upper(): float(v) for k, v in prices_payload.items()}
         if isinstance(markets_payload, dict):
             STATE.poly_markets = dict(markets_payload)
+        STATE.invalidate_valuations()
         return len(STATE.stock_prices), len(STATE.poly_markets)
 
 
@@ -234,7 +238,7 @@ def _seed_forum(rng: random.Random, posts_payload: dict, comments_payload: dict,
                 "comments_count": 0,
             }
             STATE.next_forum_post_id += 1
-            STATE.forum_posts.append(post)
+            STATE.add_forum_post_unlocked(post)
             STATE.record_operation("forum_post", agent_uuid=agent_uuid, details={"post_id": post["post_id"], "symbol": symbol})
             post_count += 1
 
@@ -286,7 +290,9 @@ def _normalize_timestamps(seed: int) -> None:
             comment["created_at"] = (start + timedelta(minutes=60 + idx)).isoformat()
 
         for idx, event in enumerate(STATE.activity_log):
-            event["created_at"] = (start + timedelta(minutes=idx)).isoformat()
+            created = start + timedelta(minutes=idx)
+            event["created_at"] = created.isoformat()
+            event["created_ts"] = created.timestamp()
 
 
 def run_seed(seed: int, reset: bool, scenario: str) -> dict: